@@ -11,6 +11,9 @@ from app.models.role import Role
 from app.models.user import User  
 from app.models.company import Company  
 from app.models.booking import Booking
+from app.models.booking_rollup import BookingDailyRollup
+from app.models.outbox import OutboxEvent
+from app.models.resource_version import ResourceVersion
 sys.path.append(os.getcwd())
 
 from app.db.base import Base
@@ -0,0 +1,33 @@
+"""create booking daily rollups table
+
+Revision ID: 0002_booking_daily_rollups
+Revises: 0001_create_users_roles
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002_booking_daily_rollups'
+down_revision = '0001_create_users_roles'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # derived data: no foreign keys; filled by 0008 once bookings carry
+    # company_id, rebuilt by `python -m app.services.rollup`
+    op.create_table(
+        'booking_daily_rollups',
+        sa.Column('company_id', sa.Integer, nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('day', sa.Date, nullable=False),
+        sa.Column('driver_id', sa.Integer, nullable=False),
+        sa.Column('booking_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('price_total', sa.BigInteger, nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint(
+            'company_id', 'status', 'day', 'driver_id',
+            name='pk_booking_daily_rollups'
+        ),
+    )
+
+def downgrade():
+    op.drop_table('booking_daily_rollups')
@@ -0,0 +1,93 @@
+"""create companies, vehicles and bookings tables; add query indexes
+
+0001 only created users and roles, so databases built from the migrations
+alone lacked the rest of the schema. Tables are created only when missing,
+since most deployments got them from metadata.create_all().
+
+Revision ID: 0003_core_tables_and_indexes
+Revises: 0002_booking_daily_rollups
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003_core_tables_and_indexes'
+down_revision = '0002_booking_daily_rollups'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_users_company_id', 'users', ['company_id']),
+    ('ix_vehicles_driver_id', 'vehicles', ['driver_id']),
+    ('ix_vehicles_company_id', 'vehicles', ['company_id']),
+    ('ix_bookings_pickup_time_id', 'bookings', ['pickup_time', 'id']),
+    ('ix_bookings_driver_id_pickup_time', 'bookings', ['driver_id', 'pickup_time', 'id']),
+    ('ix_bookings_status_pickup_time', 'bookings', ['status', 'pickup_time']),
+    ('ix_bookings_vehicle_id', 'bookings', ['vehicle_id']),
+]
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if 'companies' not in tables:
+        op.create_table(
+            'companies',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('name', sa.String, nullable=False),
+            sa.Column('address', sa.String, nullable=True),
+        )
+        op.create_index('ix_companies_name', 'companies', ['name'], unique=True)
+
+    if 'company_id' not in {c['name'] for c in inspector.get_columns('users')}:
+        # nullable: users created before companies existed have none
+        op.add_column('users', sa.Column(
+            'company_id', sa.Integer,
+            sa.ForeignKey('companies.id', name='fk_users_company_id_companies'),
+            nullable=True,
+        ))
+
+    if 'vehicles' not in tables:
+        op.create_table(
+            'vehicles',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('make', sa.String, nullable=False, index=True),
+            sa.Column('model', sa.String, nullable=False, index=True),
+            sa.Column('driver_id', sa.Integer, sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('registration_number', sa.String, nullable=False),
+            sa.Column('company_id', sa.Integer, sa.ForeignKey('companies.id'), nullable=False),
+        )
+        op.create_index(
+            'ix_vehicles_registration_number', 'vehicles',
+            ['registration_number'], unique=True
+        )
+
+    if 'bookings' not in tables:
+        op.create_table(
+            'bookings',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('driver_id', sa.Integer, sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('vehicle_id', sa.Integer, sa.ForeignKey('vehicles.id'), nullable=False),
+            sa.Column(
+                'status',
+                sa.Enum('upcoming', 'in_progress', 'completed', name='bookingstatus'),
+                nullable=False,
+            ),
+            sa.Column('pickup_time', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('dropoff_time', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('origin', sa.String, nullable=False),
+            sa.Column('destination', sa.String, nullable=False),
+            sa.Column(
+                'created_at', sa.DateTime(timezone=True),
+                server_default=sa.func.now(), nullable=False
+            ),
+            sa.Column('price', sa.Integer, nullable=False),
+        )
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+def downgrade():
+    # tables may predate this revision, so only the indexes are removed
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
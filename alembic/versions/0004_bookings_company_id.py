@@ -0,0 +1,63 @@
+"""denormalize company_id onto bookings
+
+Revision ID: 0004_bookings_company_id
+Revises: 0003_core_tables_and_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004_bookings_company_id'
+down_revision = '0003_core_tables_and_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('bookings', sa.Column('company_id', sa.Integer, nullable=True))
+    op.execute("""
+        UPDATE bookings b
+           SET company_id = u.company_id
+          FROM users u
+         WHERE u.id = b.driver_id
+    """)
+    # users.company_id is nullable (users predating companies): fall back
+    # to the company of the booked vehicle
+    op.execute("""
+        UPDATE bookings b
+           SET company_id = v.company_id
+          FROM vehicles v
+         WHERE v.id = b.vehicle_id
+           AND b.company_id IS NULL
+    """)
+    orphans = op.get_bind().execute(sa.text(
+        "SELECT id FROM bookings WHERE company_id IS NULL ORDER BY id LIMIT 10"
+    )).scalars().all()
+    if orphans:
+        raise RuntimeError(
+            "Bookings without a company (neither driver nor vehicle has one), "
+            f"e.g. ids {orphans}: assign users.company_id and rerun the migration"
+        )
+    op.alter_column('bookings', 'company_id', nullable=False)
+    op.create_foreign_key(
+        'fk_bookings_company_id_companies', 'bookings', 'companies',
+        ['company_id'], ['id']
+    )
+    op.create_index(
+        'ix_bookings_company_id_pickup_time_id', 'bookings',
+        ['company_id', 'pickup_time', 'id']
+    )
+    op.create_index(
+        'ix_bookings_company_id_status_pickup_time', 'bookings',
+        ['company_id', 'status', 'pickup_time']
+    )
+    # superseded by the company-scoped indexes above
+    op.drop_index('ix_bookings_pickup_time_id', table_name='bookings')
+    op.drop_index('ix_bookings_status_pickup_time', table_name='bookings')
+
+def downgrade():
+    op.create_index('ix_bookings_status_pickup_time', 'bookings', ['status', 'pickup_time'])
+    op.create_index('ix_bookings_pickup_time_id', 'bookings', ['pickup_time', 'id'])
+    op.drop_index('ix_bookings_company_id_status_pickup_time', table_name='bookings')
+    op.drop_index('ix_bookings_company_id_pickup_time_id', table_name='bookings')
+    op.drop_constraint('fk_bookings_company_id_companies', 'bookings', type_='foreignkey')
+    op.drop_column('bookings', 'company_id')
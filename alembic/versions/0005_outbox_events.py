@@ -0,0 +1,29 @@
+"""create outbox events table
+
+Revision ID: 0005_outbox_events
+Revises: 0004_bookings_company_id
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005_outbox_events'
+down_revision = '0004_bookings_company_id'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'outbox_events',
+        sa.Column('id', sa.BigInteger, primary_key=True),
+        sa.Column('company_id', sa.Integer, nullable=False),
+        sa.Column('driver_id', sa.Integer, nullable=True),
+        sa.Column('payload', sa.Text, nullable=False),
+        sa.Column(
+            'created_at', sa.DateTime(timezone=True),
+            server_default=sa.func.now(), nullable=False
+        ),
+    )
+
+def downgrade():
+    op.drop_table('outbox_events')
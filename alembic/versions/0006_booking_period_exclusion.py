@@ -0,0 +1,39 @@
+"""add bookings.period and forbid overlapping bookings of a vehicle
+
+Fails if existing bookings of a vehicle already overlap; Postgres names
+the conflicting rows, which must be fixed before upgrading.
+
+Revision ID: 0006_booking_period_exclusion
+Revises: 0005_outbox_events
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSTZRANGE
+
+revision = '0006_booking_period_exclusion'
+down_revision = '0005_outbox_events'
+branch_labels = None
+depends_on = None
+
+# keep in sync with app.models.booking.PERIOD_SQL
+PERIOD_SQL = (
+    "CASE WHEN dropoff_time IS NULL THEN tstzrange(pickup_time, pickup_time, '[]') "
+    "ELSE tstzrange(pickup_time, dropoff_time, '[)') END"
+)
+
+def upgrade():
+    # lets the GiST index combine vehicle_id equality with range overlap
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column('bookings', sa.Column(
+        'period', TSTZRANGE, sa.Computed(PERIOD_SQL, persisted=True), nullable=False
+    ))
+    op.create_exclude_constraint(
+        'ex_bookings_vehicle_id_period', 'bookings',
+        ('vehicle_id', '='), ('period', '&&'),
+        using='gist',
+    )
+
+def downgrade():
+    op.drop_constraint('ex_bookings_vehicle_id_period', 'bookings')
+    op.drop_column('bookings', 'period')
@@ -0,0 +1,24 @@
+"""create resource versions table
+
+Revision ID: 0007_resource_versions
+Revises: 0006_booking_period_exclusion
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007_resource_versions'
+down_revision = '0006_booking_period_exclusion'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'resource_versions',
+        sa.Column('company_id', sa.Integer, primary_key=True),
+        sa.Column('resource', sa.String(20), primary_key=True),
+        sa.Column('version', sa.BigInteger, nullable=False, server_default='0'),
+    )
+
+def downgrade():
+    op.drop_table('resource_versions')
@@ -0,0 +1,36 @@
+"""backfill booking daily rollups from existing bookings
+
+Revision ID: 0008_backfill_booking_rollups
+Revises: 0007_resource_versions
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = '0008_backfill_booking_rollups'
+down_revision = '0007_resource_versions'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # same recompute as `python -m app.services.rollup`, run once bookings
+    # carry company_id so reports don't read zeros after the upgrade
+    op.execute("DELETE FROM booking_daily_rollups")
+    op.execute("""
+        INSERT INTO booking_daily_rollups
+               (company_id, status, day, driver_id, booking_count, price_total)
+        SELECT company_id, status::text, (pickup_time AT TIME ZONE 'UTC')::date,
+               driver_id, count(*), coalesce(sum(price), 0)
+          FROM bookings
+         GROUP BY 1, 2, 3, 4
+    """)
+    # report ETags handed out before the backfill no longer match
+    op.execute("""
+        INSERT INTO resource_versions (company_id, resource, version)
+        SELECT DISTINCT company_id, 'bookings', 1 FROM bookings
+        ON CONFLICT (company_id, resource)
+        DO UPDATE SET version = resource_versions.version + 1
+    """)
+
+def downgrade():
+    # derived data: left in place, 0002's downgrade drops the table
+    pass
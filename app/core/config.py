@@ -1,4 +1,5 @@
 
+from typing import Literal, Optional
 from pydantic import PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,8 +10,81 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: PostgresDsn
+    DATABASE_REPLICA_URL: Optional[PostgresDsn] = None
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     ALGORITHM: str = "HS256"
 
+    # Engine and connection pool (applied to primary and replica alike)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 = server default
+    # 0 disables it, e.g. behind pgbouncer in transaction mode
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_APPLICATION_NAME: str = "transport-admin-api"
+    # Read replica routing (see app.db.replica)
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 2.0
+    # Shared secret for /internal/* (X-Internal-Token); unset hides them
+    INTERNAL_TOKEN: Optional[str] = None
+
+    # Authenticated principal lookup (see app.core.principal)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    # Build the principal from token claims only, never touching the DB
+    AUTH_STATELESS: bool = False
+
+    # bcrypt runs on a dedicated thread pool; beyond the queue limit -> 503
+    HASHING_WORKERS: int = 4
+    HASHING_QUEUE_LIMIT: int = 64
+
+    # Booking websocket fan-out: per-connection queue and what to do when full
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_SLOW_CONSUMER_POLICY: Literal["drop_oldest", "disconnect"] = "drop_oldest"
+    # How booking events reach the websockets of every worker
+    EVENT_BUS_BACKEND: Literal["postgres", "memory"] = "postgres"
+    EVENT_BUS_CHANNEL: str = "booking_events"
+    # Startup fails if the postgres bus can't LISTEN within this time
+    EVENT_BUS_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    # Outbox dispatcher: rows per publish batch, idle poll interval
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+
+    # Articles feed: served from cache, refreshed in the background (0 = off)
+    ARTICLES_TTL_SECONDS: int = 300
+    ARTICLES_REFRESH_INTERVAL_SECONDS: int = 300
+    # "auto" prefers selectolax, then lxml, then the stdlib html.parser
+    ARTICLES_PARSER: Literal["auto", "selectolax", "lxml", "html.parser"] = "auto"
+
+    # Invoice PDFs: render processes (0 = one per CPU), cache budget, ZIP batch
+    INVOICE_WORKERS: int = 0
+    INVOICE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    INVOICE_BATCH_SIZE: int = 50
+    # Rows per cursor batch of /bookings/export
+    EXPORT_BATCH_SIZE: int = 5000
+    # Rows validated, inserted and committed together by /bookings/bulk
+    BULK_IMPORT_BATCH_SIZE: int = 1000
+    BULK_IMPORT_MAX_ERRORS: int = 1000
+
+    # In-memory per-company schedules answering /vehicles/available for
+    # windows that start within the horizon; kept warm from booking events
+    AVAILABILITY_CACHE_ENABLED: bool = False
+    AVAILABILITY_CACHE_HORIZON_DAYS: int = 7
+    AVAILABILITY_CACHE_TTL_SECONDS: float = 300.0
+    # Confirms the app runs as one worker process. The cache relies on the
+    # postgres event bus otherwise, so the memory bus needs this set.
+    SINGLE_WORKER: bool = False
+
+    # Request metrics at /metrics, Server-Timing headers, event-loop lag
+    METRICS_ENABLED: bool = True
+    # Bearer token for scraping /metrics (INTERNAL_TOKEN also works); unset
+    # and without INTERNAL_TOKEN, /metrics is hidden
+    METRICS_TOKEN: Optional[str] = None
+    EVENT_LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+
 settings = Settings()
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncConnection
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], None]
+
+class EventBus(ABC):
+    """
+    Carries serialized booking events between workers. Every worker calls
+    `start(handler)` once and then receives every published payload,
+    including its own, through `handler`.
+    """
+    @abstractmethod
+    async def start(self, handler: Handler) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, payload: str) -> None:
+        ...
+
+    async def publish_many(self, payloads: List[str]) -> None:
+        for payload in payloads:
+            await self.publish(payload)
+
+    async def stop(self) -> None:
+        pass
+
+class InMemoryEventBus(EventBus):
+    """Single-process bus: publish hands the payload straight to the handler."""
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+
+    async def publish(self, payload: str) -> None:
+        if self._handler is not None:
+            self._handler(payload)
+
+class PostgresEventBus(EventBus):
+    """
+    LISTEN/NOTIFY over the application's asyncpg engine. One pooled
+    connection per worker is held for LISTEN and re-established with a
+    backoff if it drops; publishing borrows a connection per call.
+    NOTIFY payloads are limited to 8000 bytes. `start` fails if the first
+    LISTEN is not established within `ready_timeout` seconds.
+    """
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        channel: str,
+        reconnect_delay: float = 1.0,
+        ready_timeout: float = 10.0
+    ):
+        self.engine = engine
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.ready_timeout = ready_timeout
+        self._handler: Optional[Handler] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self._task = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.ready_timeout)
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise RuntimeError(
+                f"Could not LISTEN on {self.channel!r} within {self.ready_timeout}s; "
+                "is Postgres reachable? (EVENT_BUS_BACKEND=memory serves a single worker)"
+            ) from None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            self._handler(payload)
+        except Exception:
+            logger.exception("Failed to dispatch %s notification", channel)
+
+    async def _listen(self):
+        while True:
+            conn: Optional[AsyncConnection] = None
+            try:
+                conn = await self.engine.connect()
+                raw = await conn.get_raw_connection()
+                driver = raw.driver_connection
+                await driver.add_listener(self.channel, self._on_notify)
+                self._ready.set()
+                while not driver.is_closed():
+                    await asyncio.sleep(self.reconnect_delay)
+                logger.warning("LISTEN connection on %s closed", self.channel)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN on %s failed, retrying", self.channel)
+            finally:
+                if conn is not None:
+                    try:
+                        await conn.close()
+                    except Exception:
+                        pass
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def publish(self, payload: str) -> None:
+        async with self.engine.connect() as conn:
+            await conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": payload},
+            )
+            await conn.commit()
+
+    async def publish_many(self, payloads: List[str]) -> None:
+        # one round trip for the whole batch
+        async with self.engine.connect() as conn:
+            await conn.execute(
+                text(
+                    "SELECT pg_notify(:channel, p) "
+                    "FROM unnest(CAST(:payloads AS text[])) AS p"
+                ),
+                {"channel": self.channel, "payloads": payloads},
+            )
+            await conn.commit()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+def make_event_bus() -> EventBus:
+    if settings.EVENT_BUS_BACKEND == "postgres":
+        from app.db.session import engine
+        return PostgresEventBus(
+            engine, settings.EVENT_BUS_CHANNEL,
+            ready_timeout=settings.EVENT_BUS_CONNECT_TIMEOUT_SECONDS,
+        )
+    return InMemoryEventBus()
@@ -0,0 +1,226 @@
+"""
+Lightweight request instrumentation exported in Prometheus text format.
+
+`MetricsMiddleware` times every HTTP request per route template and adds a
+Server-Timing header; SQLAlchemy cursor events count statements and their
+time against the current request; `track()` times other expensive work
+(bcrypt, PDF rendering, scraping); a background task samples event-loop
+lag. Everything is plain counters and fixed-bucket histograms, cheap
+enough to leave on in production.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (str(bound),))} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ("method", "route", "status"),
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements issued per request",
+    ("method", "route"), buckets=COUNT_BUCKETS,
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL per request",
+    ("method", "route"),
+)
+SQL_STATEMENTS = Counter("sql_statements_total", "SQL statements executed", ("engine",))
+SQL_SECONDS = Counter("sql_duration_seconds_total", "Time spent executing SQL", ("engine",))
+WORK_SECONDS = Histogram(
+    "work_duration_seconds", "Duration of tracked expensive operations", ("operation",),
+)
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "Delay of a scheduled event-loop wakeup",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+METRICS = [
+    REQUEST_LATENCY, REQUEST_SQL_STATEMENTS, REQUEST_SQL_SECONDS,
+    SQL_STATEMENTS, SQL_SECONDS, WORK_SECONDS, LOOP_LAG,
+]
+
+# Gauge sources: callables returning {metric name: value}, read at scrape time
+_gauge_sources: List[Tuple[str, Callable[[], Dict[str, float]]]] = []
+
+def register_gauges(prefix: str, source: Callable[[], Dict[str, float]]) -> None:
+    _gauge_sources.append((prefix, source))
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for prefix, source in _gauge_sources:
+        for key, value in _flatten(prefix, source()):
+            lines.append(f"# TYPE {key} gauge")
+            lines.append(f"{key} {value}")
+    return "\n".join(lines) + "\n"
+
+def _flatten(prefix: str, values: Dict) -> Iterable[Tuple[str, float]]:
+    for key, value in values.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from _flatten(name, value)
+        elif isinstance(value, (bool, int, float)):
+            yield name, float(value)
+
+class RequestStats:
+    __slots__ = ("sql_count", "sql_seconds", "work")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.work: Dict[str, float] = {}
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+@contextmanager
+def track(operation: str):
+    """Time a block into the work histogram and the request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        WORK_SECONDS.observe(elapsed, operation)
+        stats = current_request.get()
+        if stats is not None:
+            stats.work[operation] = stats.work.get(operation, 0.0) + elapsed
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        SQL_STATEMENTS.inc(name)
+        SQL_SECONDS.inc(name, amount=elapsed)
+        # SQLAlchemy's greenlets share the calling task's context
+        stats = current_request.get()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_seconds += elapsed
+
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
+
+def _server_timing(stats: RequestStats, total: float) -> bytes:
+    parts = [f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.sql_count} queries"']
+    parts.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stats.work.items())
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts).encode()
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are not buffered."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    _server_timing(stats, time.perf_counter() - start),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, path, str(status_code))
+            REQUEST_SQL_STATEMENTS.observe(stats.sql_count, method, path)
+            REQUEST_SQL_SECONDS.observe(stats.sql_seconds, method, path)
+            current_request.reset(token)
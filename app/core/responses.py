@@ -0,0 +1,42 @@
+"""
+JSON response for content that is already plain data.
+
+FastAPI validates a returned value against the response model and runs it
+through jsonable_encoder before encoding, which dominates the time spent
+on long lists. List endpoints that select plain rows (dicts of scalars,
+datetimes and enums) return `FastJSONResponse` directly to skip both
+steps. orjson is used when installed, the standard library otherwise.
+Datetimes are written the way Pydantic writes them (UTC as "Z"), so either
+path produces the same payload.
+"""
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+def _default(value):
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,8 +1,13 @@
 from jose import jwt
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Dict
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import track
 
 # enforce a strong secret
 if len(settings.SECRET_KEY) < 32:
@@ -16,6 +21,53 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+class HashingPool:
+    """
+    Runs bcrypt on a bounded thread pool so a login never blocks the event
+    loop. bcrypt releases the GIL, so the workers hash in parallel.
+    Once `workers + queue_limit` calls are in flight, new ones are rejected
+    with 503 instead of piling up behind the pool.
+    """
+    def __init__(self, workers: int, queue_limit: int):
+        self.capacity = workers + queue_limit
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+
+    async def run(self, fn, *args):
+        # only touched from the event loop thread, so no lock is needed
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            with track("bcrypt"):
+                return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
+
+hashing_pool = HashingPool(settings.HASHING_WORKERS, settings.HASHING_QUEUE_LIMIT)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await hashing_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
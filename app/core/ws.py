@@ -1,20 +1,179 @@
-from typing import List, Dict, Any
+import asyncio
+import json
+import logging
+from datetime import date, datetime
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set, Tuple
 from fastapi import WebSocket
+from app.core.config import settings
+from app.core.events import EventBus, InMemoryEventBus, make_event_bus
+
+logger = logging.getLogger(__name__)
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def encode_message(message: Dict[str, Any]) -> str:
+    return json.dumps(message, default=_json_default)
+
+class Connection:
+    """
+    One subscribed socket with its own bounded send queue, drained by a
+    dedicated writer task so a slow client never holds up the broadcaster.
+    `driver_id` is None for admins (every event of the company), otherwise
+    only that driver's events are delivered.
+    """
+    def __init__(self, websocket: WebSocket, company_id: int, driver_id: Optional[int]):
+        self.websocket = websocket
+        self.company_id = company_id
+        self.driver_id = driver_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.writer: Optional[asyncio.Task] = None
+
+    def wants(self, driver_id: Optional[int]) -> bool:
+        return self.driver_id is None or self.driver_id == driver_id
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """
+    Local websocket registry of one worker. Broadcasts go through the event
+    bus so that every worker, this one included, fans them out to its own
+    sockets; call `start()` before broadcasting.
+    """
+    def __init__(
+        self,
+        bus: Optional[EventBus] = None,
+        slow_consumer_policy: str = "drop_oldest"
+    ):
+        self.bus = bus or InMemoryEventBus()
+        # company_id -> connections subscribed to that company's channel
+        self.channels: Dict[int, Set[Connection]] = {}
+        self.slow_consumer_policy = slow_consumer_policy
+        self.dropped_messages = 0
+        self.dropped_connections = 0
+        # in-process consumers of every event: fn(text, company_id)
+        self.listeners: List[Callable[[str, int], None]] = []
+        # pending closes of evicted sockets; the loop only holds weak refs
+        self._close_tasks: Set[asyncio.Task] = set()
+
+    async def start(self):
+        await self.bus.start(self._on_event)
+
+    async def stop(self):
+        await self.bus.stop()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "channels": len(self.channels),
+            "connections": sum(len(c) for c in self.channels.values()),
+            "dropped_messages": self.dropped_messages,
+            "dropped_connections": self.dropped_connections,
+        }
 
-    async def connect(self, websocket: WebSocket):
+    @property
+    def active_connections(self) -> int:
+        return sum(len(conns) for conns in self.channels.values())
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        company_id: int,
+        driver_id: Optional[int] = None
+    ) -> Connection:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        conn = Connection(websocket, company_id, driver_id)
+        conn.writer = asyncio.create_task(self._write(conn))
+        self.channels.setdefault(company_id, set()).add(conn)
+        return conn
+
+    def disconnect(self, conn: Connection):
+        conns = self.channels.get(conn.company_id)
+        if conns is not None:
+            conns.discard(conn)
+            if not conns:
+                del self.channels[conn.company_id]
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
+
+    async def _write(self, conn: Connection):
+        try:
+            while True:
+                text = await conn.queue.get()
+                await conn.websocket.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # dead socket: forget it without disturbing anyone else
+            logger.info("Dropping websocket after send failure: %s", e)
+            self.disconnect(conn)
+
+    def _enqueue(self, conn: Connection, text: str):
+        try:
+            conn.queue.put_nowait(text)
+            return
+        except asyncio.QueueFull:
+            pass
+        if self.slow_consumer_policy == "disconnect":
+            self.dropped_connections += 1
+            self.disconnect(conn)
+            task = asyncio.create_task(self._close(conn))
+            self._close_tasks.add(task)
+            task.add_done_callback(self._close_tasks.discard)
+            return
+        # drop_oldest: keep the freshest state, discard the stalest event
+        conn.queue.get_nowait()
+        conn.queue.put_nowait(text)
+        self.dropped_messages += 1
+
+    async def _close(self, conn: Connection):
+        try:
+            await conn.websocket.close(code=1013)  # try again later
+        except Exception:
+            pass
+
+    async def broadcast(
+        self,
+        message: Dict[str, Any],
+        company_id: int,
+        driver_id: Optional[int] = None
+    ):
+        """
+        Publish `message` once on the event bus for the company's channel
+        (and, for driver subscribers, only events about that driver). The
+        payload is serialized here, once, and shipped pre-encoded.
+        """
+        await self.publish([(encode_message(message), company_id, driver_id)])
+
+    async def publish(self, events: Iterable[Tuple[str, int, Optional[int]]]):
+        """Publish already encoded (text, company_id, driver_id) events."""
+        await self.bus.publish_many([
+            json.dumps({"company_id": company_id, "driver_id": driver_id, "text": text})
+            for text, company_id, driver_id in events
+        ])
+
+    def add_listener(self, listener: Callable[[str, int], None]) -> None:
+        self.listeners.append(listener)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+    def _on_event(self, payload: str):
+        envelope = json.loads(payload)
+        for listener in self.listeners:
+            try:
+                listener(envelope["text"], envelope["company_id"])
+            except Exception:
+                logger.exception("Event listener failed")
+        self.deliver(envelope["text"], envelope["company_id"], envelope["driver_id"])
 
-    async def broadcast(self, message: Dict[str, Any]):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+    def deliver(self, text: str, company_id: int, driver_id: Optional[int] = None):
+        """Queue an encoded event on this worker's matching connections."""
+        conns = self.channels.get(company_id)
+        if not conns:
+            return
+        for conn in list(conns):
+            if conn.wants(driver_id):
+                self._enqueue(conn, text)
 
 # instantiate a single manager for bookings
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(
+    bus=make_event_bus(),
+    slow_consumer_policy=settings.WS_SLOW_CONSUMER_POLICY,
+)
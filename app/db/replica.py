@@ -0,0 +1,192 @@
+"""
+Routing of read-only work to the read replica.
+
+Reads go to the replica unless it is missing, unhealthy, lagging by more
+than DB_REPLICA_MAX_LAG_SECONDS, or the caller committed a write within the
+last DB_READ_YOUR_WRITES_SECONDS (read-your-writes). In all those cases the
+primary serves the read.
+
+Recent writes are known two ways. Each worker remembers the users who
+committed on it. Because the next request may land on another worker,
+`ReadYourWritesMiddleware` also hands the client the time of its last
+write, as a `last_write` cookie and an `X-Last-Write` header. Reads
+carrying either one are routed on it. The marker is wall-clock time, so
+workers on different hosts need synchronized clocks. It is not signed: a
+forged value can only send the forger's own reads to the primary, or to
+the replica, which is what omitting it does anyway.
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import settings
+from app.db.session import async_session, replica_engine
+
+logger = logging.getLogger(__name__)
+
+# seconds the replica is behind; 0 when it has replayed everything received
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "x-last-write"
+
+# commit times of the request being handled, collected for the middleware
+_request_writes: ContextVar[Optional[List[float]]] = ContextVar("request_writes", default=None)
+
+def last_write_of(request) -> Optional[float]:
+    """The write marker a request carries, if any (header first, then cookie)."""
+    raw = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(raw) if raw else None
+    except ValueError:
+        return None
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine],
+        max_lag_seconds: float,
+        read_your_writes_seconds: float,
+        check_interval: float
+    ):
+        self.engine = engine
+        self.max_lag_seconds = max_lag_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.check_interval = check_interval
+        self.lag_seconds: Optional[float] = None  # None until first check
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self._recent_writes: Dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._replica_session = (
+            sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            if engine is not None else None
+        )
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag_seconds is not None and self.lag_seconds <= self.max_lag_seconds
+
+    def note_write(self, user_id: int) -> None:
+        self._recent_writes[user_id] = time.monotonic()
+
+    def use_replica(self, user_id: Optional[int], last_write: Optional[float] = None) -> bool:
+        if self._replica_session is None or not self.healthy:
+            return False
+        if last_write is not None and time.time() - last_write <= self.read_your_writes_seconds:
+            return False
+        written = self._recent_writes.get(user_id)
+        return written is None or time.monotonic() - written > self.read_your_writes_seconds
+
+    def session_factory(self, user_id: Optional[int], last_write: Optional[float] = None):
+        """
+        Session factory to run a read for `user_id` on; `last_write` is the
+        marker the request carried (see `last_write_of`).
+        """
+        if self.use_replica(user_id, last_write):
+            self.replica_reads += 1
+            return self._replica_session
+        self.primary_reads += 1
+        return async_session
+
+    async def start(self) -> None:
+        if self.engine is not None:
+            self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _monitor(self) -> None:
+        while True:
+            try:
+                async with self.engine.connect() as conn:
+                    self.lag_seconds = float((await conn.execute(LAG_QUERY)).scalar())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.lag_seconds = None
+                logger.warning("Replica health check failed: %s", e)
+            self._prune()
+            await asyncio.sleep(self.check_interval)
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.read_your_writes_seconds
+        for user_id, written in list(self._recent_writes.items()):
+            if written < cutoff:
+                del self._recent_writes[user_id]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "configured": self.engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+        }
+
+replica_router = ReplicaRouter(
+    replica_engine,
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    read_your_writes_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+)
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware setting the last-write marker on responses of
+    requests that committed a write, so any worker can route the client's
+    next reads to the primary.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        writes: List[float] = []
+        token = _request_writes.set(writes)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and writes:
+                marker = f"{writes[-1]:.3f}"
+                max_age = int(replica_router.read_your_writes_seconds) + 1
+                headers = list(message.get("headers", []))
+                headers.append((LAST_WRITE_HEADER.encode(), marker.encode()))
+                headers.append((b"set-cookie", (
+                    f"{LAST_WRITE_COOKIE}={marker}; Max-Age={max_age}; Path=/; "
+                    "HttpOnly; SameSite=Lax"
+                ).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writes.reset(token)
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    # get_current_user tags the request's primary session with the caller
+    user_id = session.info.get("principal_id")
+    if user_id is not None:
+        replica_router.note_write(user_id)
+        writes = _request_writes.get()
+        if writes is not None:
+            writes.append(time.time())
@@ -1,16 +1,84 @@
 # app/db/session.py
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import time
+from typing import Dict, Optional
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long checkouts wait for a connection."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "waits": self.wait_count,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+            "timeouts": self.timeouts,
+        }
+
+def make_engine(url: str) -> AsyncEngine:
+    """Build an engine with the pool and driver settings from the environment."""
+    url = make_url(url).update_query_dict({
+        # asyncpg prepared statement LRU kept per connection by SQLAlchemy
+        "prepared_statement_cache_size": str(settings.DB_PREPARED_STATEMENT_CACHE_SIZE),
+    })
+    server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        future=True,
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"server_settings": server_settings},
+    )
 
 # Engine: cast the Pydantic PostgresDsn to a plain string URL
-engine = create_async_engine(
-    str(settings.DATABASE_URL),
-    echo=True,     # set False in production
-    future=True,
+engine = make_engine(str(settings.DATABASE_URL))
+
+# Optional read replica; None means every read goes to the primary
+replica_engine: Optional[AsyncEngine] = (
+    make_engine(str(settings.DATABASE_REPLICA_URL))
+    if settings.DATABASE_REPLICA_URL else None
 )
 
+instrument_engine(engine, "primary")
+if replica_engine is not None:
+    instrument_engine(replica_engine, "replica")
+
 # Session factory for async sessions
 async_session = sessionmaker(
     bind=engine,
@@ -22,3 +90,9 @@ async_session = sessionmaker(
 async def get_db():
     async with async_session() as session:
         yield session
+
+def pool_stats() -> Dict[str, Dict[str, float]]:
+    stats = {"primary": engine.pool.stats()}
+    if replica_engine is not None:
+        stats["replica"] = replica_engine.pool.stats()
+    return stats
@@ -1,14 +1,25 @@
-from fastapi import Depends, HTTPException, status
+import hashlib
+from dataclasses import replace
+from typing import Dict, FrozenSet, Optional
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.principal import Principal, principal_cache
 from app.schemas.token import TokenPayload
 from app.services.user import get_user_by_id
+from app.services.versions import get_versions
 from app.db.session import get_db
+from app.db.replica import replica_router, last_write_of
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+def decode_access_token(token: str) -> TokenPayload:
+    """Verify a JWT and return its claims; raises JWTError when invalid."""
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return TokenPayload(**payload)
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
@@ -19,17 +30,96 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        token_data = TokenPayload(**payload)
+        token_data = decode_access_token(token)
     except JWTError as e:
         print(f"JWTError: {e}")
         raise credentials_exception
 
-    user = await get_user_by_id(db, int(token_data.sub))
-    if user is None:
-        raise credentials_exception
+    user_id = int(token_data.sub)
+    # lets commits on this request's session count as the caller's writes
+    db.info["principal_id"] = user_id
+    # Stateless mode: every column the routers need is already in the token
+    if settings.AUTH_STATELESS and token_data.username and token_data.role_id is not None:
+        return Principal(
+            id=user_id,
+            username=token_data.username,
+            email=token_data.email,
+            role_id=token_data.role_id,
+            company_id=token_data.company_id,
+        )
+
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await get_user_by_id(db, user_id)
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.set(principal)
 
     # Expose company_id for downstream filtering
-    user.company_id = token_data.company_id
-    return user
+    if principal.company_id != token_data.company_id:
+        principal = replace(principal, company_id=token_data.company_id)
+    return principal
+
+def get_read_session_factory(request: Request, current_user=Depends(get_current_user)):
+    """
+    Session factory for read-only work: the replica when it is healthy and
+    the caller has no recent write (on this worker or, per the marker the
+    request carries, any other), the primary otherwise.
+    """
+    return replica_router.session_factory(current_user.id, last_write_of(request))
+
+async def get_read_db(session_factory=Depends(get_read_session_factory)):
+    async with session_factory() as session:
+        yield session
+
+def expand_param(*allowed: str):
+    """
+    Dependency parsing `?expand=a,b` into a set of relation names; names
+    outside `allowed` are rejected with a 400.
+    """
+    def parse(
+        expand: Optional[str] = Query(
+            None, description=f"Comma-separated relations to include: {', '.join(allowed)}"
+        )
+    ) -> FrozenSet[str]:
+        names = frozenset(n.strip() for n in (expand or "").split(",") if n.strip())
+        unknown = names - set(allowed)
+        if unknown:
+            raise HTTPException(
+                status.HTTP_400_BAD_REQUEST,
+                f"Cannot expand {', '.join(sorted(unknown))}; choose from {', '.join(allowed)}"
+            )
+        return names
+    return parse
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # weak comparison, as If-None-Match requires
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def conditional_get(*resources: str):
+    """
+    Dependency answering polls of unchanged data with a 304 before the
+    endpoint runs its query. The ETag hashes the company's versions of
+    `resources` (see app.services.versions) with the caller and the query
+    string, the only inputs the response depends on. Returns the caching
+    headers to set on the response.
+    """
+    async def check(
+        request: Request,
+        db: AsyncSession = Depends(get_read_db),
+        current_user=Depends(get_current_user)
+    ) -> Dict[str, str]:
+        # read from the session serving the data, so a lagging replica
+        # pairs its old data with its old versions
+        versions = await get_versions(db, current_user.company_id, resources)
+        key = f"{current_user.id}:{current_user.role_id}:{sorted(versions.items())}:{request.url.query}"
+        etag = f'W/"{hashlib.blake2b(key.encode(), digest_size=12).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return headers
+    return check
@@ -1,3 +1,6 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth
@@ -5,7 +8,80 @@ from app.routers import bookings
 from app.routers import vehicles
 from app.routers import articles
 from app.routers import users 
-app = FastAPI(title="Transport Admin API")
+from app.routers import internal
+from app.routers import metrics
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, monitor_loop_lag, register_gauges
+from app.core.principal import principal_cache
+from app.core.security import hashing_pool
+from app.core.ws import manager
+from app.services.outbox import outbox_dispatcher
+from app.db.replica import replica_router, ReadYourWritesMiddleware
+from app.services.articles import articles_cache, validate_parser
+from app.services.invoice import invoice_cache, shutdown_pool as shutdown_invoice_pool
+from app.db.session import async_session, pool_stats
+from app.services.role import load_roles
+from app.services.fleet import fleet_cache
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    validate_parser()
+    try:
+        async with async_session() as db:
+            await load_roles(db)
+    except Exception as e:
+        # get_role_id loads them lazily instead
+        logger.warning("Could not preload roles: %s", e)
+    await replica_router.start()
+    # subscribe this worker to booking events published by any worker
+    await manager.start()
+    await outbox_dispatcher.start()
+    await articles_cache.start()
+    lag_monitor = asyncio.create_task(
+        monitor_loop_lag(settings.EVENT_LOOP_LAG_INTERVAL_SECONDS)
+    )
+    yield
+    lag_monitor.cancel()
+    try:
+        await lag_monitor
+    except asyncio.CancelledError:
+        pass
+    await articles_cache.stop()
+    shutdown_invoice_pool()
+    await outbox_dispatcher.stop()
+    await manager.stop()
+    await replica_router.stop()
+
+app = FastAPI(title="Transport Admin API", lifespan=lifespan)
+
+# component counters exported as gauges on /metrics
+register_gauges("db_pool", pool_stats)
+register_gauges("db_replica", replica_router.stats)
+register_gauges("principal_cache", principal_cache.stats)
+register_gauges("hashing_pool", hashing_pool.stats)
+register_gauges("ws", manager.stats)
+register_gauges("outbox", outbox_dispatcher.stats)
+register_gauges("invoice_cache", invoice_cache.stats)
+
+if fleet_cache is not None:
+    # the in-memory bus never carries other workers' bookings, so their
+    # caches would miss them until the TTL expires; the worker count can't
+    # be read reliably (uvicorn --workers, gunicorn -w), so it is confirmed
+    if settings.EVENT_BUS_BACKEND == "memory" and not settings.SINGLE_WORKER:
+        raise RuntimeError(
+            "AVAILABILITY_CACHE_ENABLED needs EVENT_BUS_BACKEND=postgres, "
+            "or SINGLE_WORKER=true when running one worker"
+        )
+    # keep the in-memory schedules current with every worker's bookings
+    manager.add_listener(fleet_cache.on_event)
+    register_gauges("fleet_cache", fleet_cache.stats)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if replica_router.engine is not None:
+    app.add_middleware(ReadYourWritesMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,6 +89,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "ETag", "X-Last-Write"],
 )
 
 app.include_router(auth.router)
@@ -20,3 +97,6 @@ app.include_router(bookings.router)
 app.include_router(vehicles.router)
 app.include_router(articles.router)
 app.include_router(users.router)
+app.include_router(internal.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
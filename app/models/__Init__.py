@@ -4,4 +4,7 @@ from app.models.role import Role
 from app.models.user import User
 from app.models.vehicle import Vehicle 
 from app.models.company import Company
-from app.models.booking import Booking 
\ No newline at end of file
+from app.models.booking import Booking 
+from app.models.booking_rollup import BookingDailyRollup
+from app.models.outbox import OutboxEvent
+from app.models.resource_version import ResourceVersion
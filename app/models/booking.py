@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Enum, Index, Computed
+from sqlalchemy.dialects.postgresql import TSTZRANGE, ExcludeConstraint
+from sqlalchemy.orm import relationship, deferred
 from app.db.base import Base
 import enum
 
@@ -8,12 +9,36 @@ class BookingStatus(str, enum.Enum):
     in_progress = "in_progress"
     completed = "completed"
 
+# Time a booking occupies its vehicle; without a dropoff, just the pickup
+# instant. Must stay immutable (timestamptz + interval is not) to be usable
+# in a generated column.
+PERIOD_SQL = (
+    "CASE WHEN dropoff_time IS NULL THEN tstzrange(pickup_time, pickup_time, '[]') "
+    "ELSE tstzrange(pickup_time, dropoff_time, '[)') END"
+)
+
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # tenant-scoped keyset pagination order of list_bookings
+        Index("ix_bookings_company_id_pickup_time_id", "company_id", "pickup_time", "id"),
+        Index("ix_bookings_company_id_status_pickup_time", "company_id", "status", "pickup_time"),
+        # driver-scoped listings
+        Index("ix_bookings_driver_id_pickup_time", "driver_id", "pickup_time", "id"),
+        Index("ix_bookings_vehicle_id", "vehicle_id"),
+        # no vehicle is booked twice at once; the GiST index behind it
+        # (needs btree_gist) also serves availability lookups
+        ExcludeConstraint(
+            ("vehicle_id", "="), ("period", "&&"),
+            name="ex_bookings_vehicle_id_period", using="gist",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     driver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
+    # copy of the driver's company so tenant filters need no users join
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
     status = Column(Enum(BookingStatus), nullable=False, default=BookingStatus.upcoming)
     pickup_time = Column(DateTime(timezone=True), nullable=False)
     dropoff_time = Column(DateTime(timezone=True), nullable=True)
@@ -21,6 +46,8 @@ class Booking(Base):
     destination = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     price = Column(Integer, nullable=False)
+    # only used in SQL, so not loaded with the row
+    period = deferred(Column(TSTZRANGE, Computed(PERIOD_SQL, persisted=True), nullable=False))
 
     # Relationships
     driver = relationship("User", back_populates="bookings")
@@ -0,0 +1,21 @@
+# app/models/booking_rollup.py
+
+from sqlalchemy import Column, Integer, BigInteger, Date, Enum
+from app.db.base import Base
+from app.models.booking import BookingStatus
+
+class BookingDailyRollup(Base):
+    """
+    Per company/driver/status/day totals of bookings, keyed on the UTC date
+    of pickup_time. Maintained alongside every booking write and read by the
+    reports instead of scanning bookings.
+    """
+    __tablename__ = "booking_daily_rollups"
+
+    # primary key order doubles as the report index: tenant, status, day range
+    company_id    = Column(Integer, primary_key=True)
+    status        = Column(Enum(BookingStatus, native_enum=False, length=20), primary_key=True)
+    day           = Column(Date,    primary_key=True)
+    driver_id     = Column(Integer, primary_key=True)
+    booking_count = Column(Integer,    nullable=False, default=0)
+    price_total   = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,17 @@
+# app/models/outbox.py
+
+from sqlalchemy import Column, BigInteger, Integer, Text, DateTime, func
+from app.db.base import Base
+
+class OutboxEvent(Base):
+    """
+    A booking event written in the same transaction as the booking change
+    and deleted by the dispatcher once it has been published.
+    """
+    __tablename__ = "outbox_events"
+
+    id         = Column(BigInteger, primary_key=True)
+    company_id = Column(Integer, nullable=False)
+    driver_id  = Column(Integer, nullable=True)
+    payload    = Column(Text,    nullable=False)  # pre-encoded JSON message
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
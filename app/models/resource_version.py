@@ -0,0 +1,16 @@
+# app/models/resource_version.py
+
+from sqlalchemy import Column, Integer, BigInteger, String
+from app.db.base import Base
+
+class ResourceVersion(Base):
+    """
+    Per company write counter of one kind of resource ("bookings",
+    "vehicles", "users"), bumped in the same transaction as the write.
+    List and report endpoints derive their ETags from it.
+    """
+    __tablename__ = "resource_versions"
+
+    company_id = Column(Integer,    primary_key=True)
+    resource   = Column(String(20), primary_key=True)
+    version    = Column(BigInteger, nullable=False, default=0)
@@ -12,7 +12,7 @@ class User(Base):
     email           = Column(String,  unique=True, index=True, nullable=False)
     hashed_password = Column(String,                nullable=False)
     role_id         = Column(Integer, ForeignKey("roles.id"), nullable=False)
-    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    company_id      = Column(Integer, ForeignKey("companies.id"), index=True, nullable=False)
 
     # relationships
     role      = relationship("Role",    back_populates="users")
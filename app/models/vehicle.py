@@ -10,9 +10,9 @@ class Vehicle(Base):
     id                  = Column(Integer, primary_key=True, index=True)
     make                = Column(String,  index=True, nullable=False)
     model               = Column(String,  index=True, nullable=False)
-    driver_id           = Column(Integer, ForeignKey("users.id"), nullable=False)
+    driver_id           = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     registration_number = Column(String, unique=True, index=True, nullable=False)
-    company_id          = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    company_id          = Column(Integer, ForeignKey("companies.id"), index=True, nullable=False)
 
     # relationships
     driver  = relationship("User",    back_populates="vehicles")
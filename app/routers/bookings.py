@@ -1,40 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Response, Query, Request
+from jose import JWTError
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
-from io import BytesIO
-from reportlab.pdfgen import canvas
 from typing import List
 
 from app.schemas.booking import (
-    BookingCreate, BookingRead, BookingFilter,
-    EarningsReport, CountReport, ReportParams, StatusUpdate
+    BookingCreate, BookingRead, BookingReadExpanded, BookingFilter,
+    EarningsReport, CountReport, BookingReport, ReportParams, StatusUpdate,
+    BulkImportResult
 )
 from app.services.booking import (
-    list_bookings, create_booking,
+    list_bookings, list_booking_rows, booking_read, stream_bookings, create_booking,
     earnings_report, count_report, get_booking,update_booking_status
 )
-from app.dependencies import get_db, get_current_user
+from app.services.report import booking_report
+from app.services.booking_import import import_bookings, json_rows, ndjson_rows, csv_rows
+from app.services.invoice import invoice_pdf, stream_invoices
+from app.services.export import export_bookings, export_formats
+from app.services.versions import BOOKINGS, VEHICLES, USERS
+from app.dependencies import (
+    get_db, get_read_db, get_read_session_factory, get_current_user, decode_access_token,
+    expand_param, conditional_get
+)
 from app.core.ws import manager
+from app.core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
 @router.websocket("/ws/bookings")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
+    """
+    Booking events of the caller's company. Browsers can't set headers on
+    websockets, so the access token comes in the `token` query parameter.
+    Admins receive every event of the company, drivers only their own.
+    """
+    try:
+        claims = decode_access_token(token)
+    except JWTError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    driver_id = None if claims.role_id == 1 else int(claims.sub)
+    conn = await manager.connect(websocket, claims.company_id, driver_id)
     try:
         while True:
             await websocket.receive_text()
-    except:
-        manager.disconnect(websocket)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(conn)
 
-@router.get("/", response_model=List[BookingRead])
+@router.get("/", response_model=List[BookingReadExpanded], response_model_exclude_unset=True)
 async def read_bookings(
+    response: Response,
     status: BookingFilter = Depends(),
-    db: AsyncSession = Depends(get_db),
-    current_user=Depends(get_current_user)
+    expand=Depends(expand_param("driver", "vehicle")),
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+    # drivers and vehicles count too: ?expand= can include them
+    cache_headers=Depends(conditional_get(BOOKINGS, VEHICLES, USERS))
+):
+    if not expand:
+        # plain rows straight to JSON, without per-row model validation
+        rows, next_cursor = await list_booking_rows(db, current_user, status)
+        headers = dict(cache_headers)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return FastJSONResponse(rows, headers=headers)
+    bookings, next_cursor = await list_bookings(db, current_user, status, expand)
+    response.headers.update(cache_headers)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [booking_read(b, expand) for b in bookings]
+
+@router.get("/stream")
+async def stream_all_bookings(
+    filters: BookingFilter = Depends(),
+    current_user=Depends(get_current_user),
+    session_factory=Depends(get_read_session_factory)
 ):
-    return await list_bookings(db, current_user, status)
+    """Full filtered history as NDJSON, streamed in constant memory."""
+    return StreamingResponse(
+        stream_bookings(
+            current_user, filters,
+            session_factory=session_factory
+        ),
+        media_type="application/x-ndjson"
+    )
 
 @router.post("/", response_model=BookingRead, status_code=status.HTTP_201_CREATED)
 async def create_new_booking(
@@ -42,24 +93,112 @@ async def create_new_booking(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    return await create_booking(db, booking_in, current_user, manager)
+    return await create_booking(db, booking_in, current_user)
+
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_bookings(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """
+    Import many bookings at once from a JSON array, or from an NDJSON or CSV
+    (with header) upload that is streamed rather than buffered. Invalid rows
+    are skipped and reported by position; valid ones are imported.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == "application/json":
+        try:
+            items = await request.json()
+        except ValueError:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid JSON body")
+        if not isinstance(items, list):
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Expected a JSON array")
+        rows = json_rows(items)
+    elif content_type in ("application/x-ndjson", "application/jsonl"):
+        rows = ndjson_rows(request.stream())
+    elif content_type == "text/csv":
+        rows = csv_rows(request.stream())
+    else:
+        raise HTTPException(
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            "Send application/json, application/x-ndjson or text/csv"
+        )
+    return await import_bookings(db, rows, current_user)
 
 @router.get("/earnings", response_model=List[EarningsReport])
 async def get_earnings(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(get_current_user),
-    params: ReportParams = Depends()
+    params: ReportParams = Depends(),
+    cache_headers=Depends(conditional_get(BOOKINGS))
 ):
+    response.headers.update(cache_headers)
     return await earnings_report(db, current_user, params)
 
 @router.get("/count", response_model=List[CountReport])
 async def get_counts(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(get_current_user),
-    params: ReportParams = Depends()
+    params: ReportParams = Depends(),
+    cache_headers=Depends(conditional_get(BOOKINGS))
 ):
+    response.headers.update(cache_headers)
     return await count_report(db, current_user, params)
 
+@router.get("/report", response_model=List[BookingReport])
+async def get_report(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+    params: ReportParams = Depends(),
+    cache_headers=Depends(conditional_get(BOOKINGS))
+):
+    """Counts, earnings and per-status breakdown in a single round trip."""
+    response.headers.update(cache_headers)
+    return await booking_report(db, current_user, params)
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+@router.get("/export")
+async def export_all_bookings(
+    fmt: str = Query("csv", alias="format"),
+    filters: BookingFilter = Depends(),
+    current_user=Depends(get_current_user),
+    session_factory=Depends(get_read_session_factory)
+):
+    """Every booking matching the filters, streamed as CSV (or Parquet)."""
+    if fmt not in export_formats():
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Unsupported format, choose one of: {', '.join(export_formats())}"
+        )
+    return StreamingResponse(
+        export_bookings(
+            current_user, filters, fmt,
+            session_factory=session_factory
+        ),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={'Content-Disposition': f'attachment;filename=bookings.{fmt}'}
+    )
+
+@router.get("/invoices")
+async def get_invoices_zip(
+    filters: BookingFilter = Depends(),
+    current_user=Depends(get_current_user)
+):
+    """ZIP of the invoices of every booking matching the filters, streamed."""
+    return StreamingResponse(
+        stream_invoices(current_user, filters),
+        media_type='application/zip',
+        headers={'Content-Disposition': 'attachment;filename=invoices.zip'}
+    )
+
 @router.get("/{booking_id}/invoice")
 async def get_invoice(
     booking_id: int,
@@ -69,19 +208,8 @@ async def get_invoice(
     booking = await get_booking(db, booking_id, current_user)
     if not booking:
         raise HTTPException(404, "Booking not found")
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer)
-    p.drawString(100, 800, f"Invoice for Booking #{booking.id}")
-    p.drawString(100, 780, f"Driver ID: {booking.driver_id}")
-    p.drawString(100, 760, f"Vehicle ID: {booking.vehicle_id}")
-    p.drawString(100, 740, f"Price: ${booking.price}")
-    p.drawString(100, 720, f"Pickup: {booking.pickup_time}")
-    p.drawString(100, 700, f"Dropoff: {booking.dropoff_time}")
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return StreamingResponse(
-        buffer,
+    return Response(
+        await invoice_pdf(booking),
         media_type='application/pdf',
         headers={'Content-Disposition': f'attachment;filename=invoice_{booking.id}.pdf'}
     )
@@ -95,7 +223,7 @@ async def change_status(
     current_user=Depends(get_current_user)
 ):
     updated = await update_booking_status(
-        db, booking_id, status_in.status, current_user, manager
+        db, booking_id, status_in.status, current_user
     )
     if not updated:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Booking not found or unauthorized")
@@ -0,0 +1,33 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from app.core.config import settings
+from app.db.session import pool_stats
+from app.db.replica import replica_router
+from app.services.outbox import outbox_dispatcher
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """Operational endpoints exist only when INTERNAL_TOKEN is configured."""
+    if not settings.INTERNAL_TOKEN or x_internal_token != settings.INTERNAL_TOKEN:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Not Found")
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+@router.get("/pool")
+async def read_pool_stats():
+    """Connection pool usage of the primary (and replica) engine."""
+    return pool_stats()
+
+@router.get("/replica")
+async def read_replica_stats():
+    """Replica health, lag and how many reads each side served."""
+    return replica_router.stats()
+
+@router.get("/outbox")
+async def read_outbox_stats():
+    """Dispatcher throughput and lag, with the backlog still in the table."""
+    return {**outbox_dispatcher.stats(), **await outbox_dispatcher.backlog()}
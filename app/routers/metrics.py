@@ -0,0 +1,40 @@
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.metrics import render_metrics
+
+def require_scrape_token(
+    authorization: Optional[str] = Header(None),
+    x_internal_token: Optional[str] = Header(None),
+):
+    """
+    /metrics exposes pool, cache and outbox internals, so like /internal/*
+    it only exists for callers holding a token: METRICS_TOKEN as a Bearer
+    token (what Prometheus sends with `authorization: credentials`) or
+    INTERNAL_TOKEN in X-Internal-Token.
+    """
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if settings.METRICS_TOKEN and scheme.lower() == "bearer" and secrets.compare_digest(
+        credentials, settings.METRICS_TOKEN
+    ):
+        return
+    if settings.INTERNAL_TOKEN and x_internal_token and secrets.compare_digest(
+        x_internal_token, settings.INTERNAL_TOKEN
+    ):
+        return
+    raise HTTPException(status.HTTP_404_NOT_FOUND, "Not Found")
+
+router = APIRouter(
+    tags=["metrics"],
+    include_in_schema=False,
+    dependencies=[Depends(require_scrape_token)],
+)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    """Prometheus text exposition of request, SQL and component metrics."""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4"
+    )
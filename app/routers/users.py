@@ -2,27 +2,39 @@ from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.schemas.user import UserCreate, UserRead, UserUpdate
+from app.schemas.user import UserCreate, UserRead, UserReadExpanded, UserUpdate
 from app.services.user import (
     get_user_by_id,
     get_all_users,
-    create_user,
+    get_all_user_rows,
+    user_read,
+    create_company_user,
     update_user,
     delete_user
 )
-from app.dependencies import get_db, get_current_user
-from app.core.security import get_password_hash
+from app.dependencies import get_db, get_read_db, get_current_user, expand_param, conditional_get
+from app.services.versions import USERS
+from app.core.security import get_password_hash_async
+from app.core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.get("/", response_model=List[UserRead])
+@router.get("/", response_model=List[UserReadExpanded], response_model_exclude_unset=True)
 async def read_users(
-    db: AsyncSession = Depends(get_db),
-    current_user = Depends(get_current_user)
+    response: Response,
+    expand=Depends(expand_param("company", "role")),
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user),
+    cache_headers=Depends(conditional_get(USERS))
 ):
     """List all users in the current user's company."""
-    users = await get_all_users(db, current_user.company_id)
-    return users
+    if not expand:
+        return FastJSONResponse(
+            await get_all_user_rows(db, current_user.company_id), headers=cache_headers
+        )
+    response.headers.update(cache_headers)
+    users = await get_all_users(db, current_user.company_id, expand)
+    return [user_read(u, expand) for u in users]
 
 @router.get("/{user_id}", response_model=UserRead)
 async def read_user(
@@ -43,10 +55,7 @@ async def create_new_user(
     current_user = Depends(get_current_user)
 ):
     """Admin-only: Create a new user in the same company."""
-    if current_user.role_id != 1:
-        raise HTTPException(status.HTTP_403_FORBIDDEN, "Not authorized")
-    new_user = await create_user(db, user_in, current_user.company_id)
-    return new_user
+    return await create_company_user(db, user_in, current_user)
 
 @router.patch("/{user_id}", response_model=UserRead)
 async def update_existing_user(
@@ -67,7 +76,7 @@ async def update_existing_user(
     if user_in.email is not None:
         user.email = user_in.email
     if user_in.password is not None:
-        user.hashed_password = get_password_hash(user_in.password)
+        user.hashed_password = await get_password_hash_async(user_in.password)
     if user_in.role_id is not None:
         user.role_id = user_in.role_id
     updated = await update_user(db, user)
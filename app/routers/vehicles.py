@@ -1,25 +1,50 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 from typing import List
 
-from app.schemas.vehicle import VehicleRead, VehicleCreate
-from app.services.vehicle import list_vehicles, create_vehicle
-from app.dependencies import get_db, get_current_user
+from app.schemas.vehicle import VehicleRead, VehicleReadExpanded, VehicleCreate, VehicleAvailability
+from app.services.vehicle import list_vehicles, list_vehicle_rows, vehicle_read, create_vehicle, vehicle_availability
+from app.services.fleet import available_vehicles
+from app.dependencies import get_db, get_read_db, get_current_user, expand_param, conditional_get
+from app.services.versions import VEHICLES, USERS
+from app.core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/vehicles", tags=["vehicles"])
 
-@router.get("/", response_model=List[VehicleRead])
+@router.get("/", response_model=List[VehicleReadExpanded], response_model_exclude_unset=True)
 async def read_vehicles(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    expand=Depends(expand_param("driver")),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_user),
+    # drivers count too: ?expand= can include them
+    cache_headers=Depends(conditional_get(VEHICLES, USERS)),
 ):
     is_admin = current_user.role_id == 1  # Adjust this check if role IDs differ
-    return await list_vehicles(
+    if not expand:
+        return FastJSONResponse(await list_vehicle_rows(
+            db, current_user.company_id, current_user.id, is_admin
+        ), headers=cache_headers)
+    response.headers.update(cache_headers)
+    vehicles = await list_vehicles(
         db,
         current_user.company_id,
         current_user.id,
-        is_admin
+        is_admin,
+        expand
     )
+    return [vehicle_read(v, expand) for v in vehicles]
+
+@router.get("/available", response_model=List[VehicleRead])
+async def read_available_vehicles(
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user),
+):
+    """Vehicles with no booking overlapping [from, to)."""
+    return await available_vehicles(db, current_user, start, end)
 
 @router.post("/", response_model=VehicleRead, status_code=201)
 async def create_new_vehicle(
@@ -31,4 +56,20 @@ async def create_new_vehicle(
     if current_user.role_id != 1:
         # 403 Forbidden for non-admins
         raise HTTPException(status_code=403, detail="Insufficient permissions")
-    return await create_vehicle(db, vehicle_in, current_user.company_id)
\ No newline at end of file
+    return await create_vehicle(db, vehicle_in, current_user.company_id)
+
+@router.get("/{vehicle_id}/availability", response_model=VehicleAvailability)
+async def read_vehicle_availability(
+    vehicle_id: int,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(get_current_user),
+):
+    """Free time slots of a vehicle between `from` and `to` (max 31 days)."""
+    free = await vehicle_availability(
+        db, vehicle_id, current_user.company_id, start, end
+    )
+    return VehicleAvailability(
+        vehicle_id=vehicle_id, start=start, end=end, free=free
+    )
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from datetime import datetime, date
-from typing import Optional, Literal, List
+from typing import Optional, Literal, List, Dict
 from app.models.booking import BookingStatus
+from app.schemas.user import UserSummary
+from app.schemas.vehicle import VehicleSummary
 
 # Base fields
 class BookingBase(BaseModel):
@@ -13,6 +15,12 @@ class BookingBase(BaseModel):
     destination: str
     price: int
 
+    @model_validator(mode="after")
+    def check_dropoff_after_pickup(self):
+        if self.dropoff_time is not None and self.dropoff_time < self.pickup_time:
+            raise ValueError("dropoff_time must not be before pickup_time")
+        return self
+
 class BookingCreate(BookingBase):
     pass
 
@@ -24,11 +32,28 @@ class BookingRead(BookingBase):
     class Config:
         from_attributes = True
 
+class BookingReadExpanded(BookingRead):
+    driver: Optional[UserSummary] = None
+    vehicle: Optional[VehicleSummary] = None
+
 # Listing filters
 class BookingFilter(BaseModel):
     status: Optional[BookingStatus] = None
     date_from: Optional[date] = None
     date_to: Optional[date] = None
+    # Keyset pagination: pass the X-Next-Cursor header of the previous page
+    limit: int = 100
+    cursor: Optional[str] = None
+
+# Bulk import
+class BulkRowError(BaseModel):
+    row: int              # 1-based position in the upload (CSV: data rows)
+    errors: List[str]
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
 
 # Reporting
 TimeframeLiteral = Literal['daily','weekly','monthly','yearly']
@@ -41,6 +66,17 @@ class CountReport(BaseModel):
     period: str
     count: int
 
+class StatusBreakdown(BaseModel):
+    count: int
+    total: float
+
+class BookingReport(BaseModel):
+    period: str
+    count: int            # bookings of every status
+    total: float          # earnings, i.e. completed bookings only
+    average_price: float  # over completed bookings
+    by_status: Dict[str, StatusBreakdown]
+
 class ReportParams(BaseModel):
     timeframe: Optional[TimeframeLiteral] = None
     year: Optional[int] = None
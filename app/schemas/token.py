@@ -9,5 +9,7 @@ class TokenPayload(BaseModel):
     sub: str             # <— string, not int
     role_id: Optional[int]
     company_id: int
+    username: Optional[str] = None
+    email: Optional[str] = None
     exp: int
 
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+from app.schemas.company import CompanyRead
 
 class UserBase(BaseModel):
     username: str
@@ -49,4 +50,24 @@ class CompanyUserRead(UserBase):
     class Config:
         from_attributes = True
         orm_mode = True
-        populate_by_name = True
\ No newline at end of file
+        populate_by_name = True
+
+# Expanded reads (?expand=...): related rows are included only when asked for
+
+class UserSummary(BaseModel):
+    id: int
+    username: str
+
+    class Config:
+        from_attributes = True
+
+class RoleRead(BaseModel):
+    id: int
+    name: str
+
+    class Config:
+        from_attributes = True
+
+class UserReadExpanded(UserRead):
+    company: Optional[CompanyRead] = None
+    role: Optional[RoleRead] = None
@@ -1,6 +1,8 @@
 # app/schemas/vehicle.py
 from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime
+from typing import Optional, List
+from app.schemas.user import UserSummary
 
 class VehicleBase(BaseModel):
     make: str
@@ -22,3 +24,25 @@ class VehicleRead(VehicleBase):
     class Config:
         from_attributes = True
         orm_mode = True
+
+class VehicleSummary(BaseModel):
+    id: int
+    make: str
+    model: str
+    registration_number: str
+
+    class Config:
+        from_attributes = True
+
+class VehicleReadExpanded(VehicleRead):
+    driver: Optional[UserSummary] = None
+
+class TimeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+class VehicleAvailability(BaseModel):
+    vehicle_id: int
+    start: datetime
+    end: datetime
+    free: List[TimeSlot]
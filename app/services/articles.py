@@ -1,50 +1,251 @@
+import asyncio
+import logging
+import time
 import httpx
-from bs4 import BeautifulSoup
-from typing import List, Dict
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import List, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import track
+
+logger = logging.getLogger(__name__)
 
 STEEA_URL = "https://www.steea.gr/category/teleytaia-nea/"
 
-async def fetch_latest_articles() -> List[Dict[str, str]]:
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/114.0.0.0 Safari/537.36"
-        )
-    }
-    async with httpx.AsyncClient(headers=headers, timeout=10.0) as client:
-        resp = await client.get(STEEA_URL)
-        resp.raise_for_status()
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/114.0.0.0 Safari/537.36"
+    )
+}
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    articles: List[Dict[str, str]] = []
+# Field selectors, compiled once, matching the precedence the scraper has
+# always used. The title link is the first <a> of the .entry-title header;
+# only articles without such a header fall back to their first <a>. A
+# header without a link means the article is skipped.
+TITLE_HEADER_SELECTOR = "h2.entry-title, h3.entry-title"
+LINK_SELECTOR = "a"
+# Each of these is a fallback chain tried in order
+DATE_SELECTORS = ("time",)
+EXCERPT_SELECTORS = ("div.entry-summary", "div.td-excerpt", "p")
+
+_SOUP_TITLE_HEADER = soupsieve.compile(TITLE_HEADER_SELECTOR)
+_SOUP_LINK = soupsieve.compile(LINK_SELECTOR)
+_SOUP_DATE = [soupsieve.compile(s) for s in DATE_SELECTORS]
+_SOUP_EXCERPT = [soupsieve.compile(s) for s in EXCERPT_SELECTORS]
 
+def _first(node, selectors):
+    for selector in selectors:
+        found = selector.select_one(node)
+        if found is not None:
+            return found
+    return None
+
+def _parse_with_soup(html: str, parser: str) -> List[Dict[str, str]]:
+    # only build the <article> subtrees, not the whole page
+    soup = BeautifulSoup(html, parser, parse_only=SoupStrainer("article"))
+    articles: List[Dict[str, str]] = []
     for art in soup.find_all("article"):
-        # Title & URL
-        header = art.find(["h2", "h3"], class_="entry-title") or art.find("a")
-        if not header:
+        header = _SOUP_TITLE_HEADER.select_one(art)
+        link = _SOUP_LINK.select_one(header if header is not None else art)
+        if link is None or not link.get("href"):
             continue
-        link = header.find("a") if header.name in ("h2","h3") else header
-        if not link or not link.get("href"):
-            continue
-        title = link.get_text(strip=True)
-        url   = link["href"]
+        date_tag = _first(art, _SOUP_DATE)
+        excerpt_tag = _first(art, _SOUP_EXCERPT)
+        articles.append({
+            "title": link.get_text(strip=True),
+            "url": link["href"],
+            "date": date_tag.get_text(strip=True) if date_tag else "",
+            "excerpt": excerpt_tag.get_text(strip=True) if excerpt_tag else "",
+        })
+    return articles
 
-        # Date (if a <time> tag exists)
-        date_tag = art.find("time")
-        date_str = date_tag.get_text(strip=True) if date_tag else ""
+def _parse_with_selectolax(html: str) -> List[Dict[str, str]]:
+    from selectolax.parser import HTMLParser
 
-        # Excerpt (try common classes or first <p>)
-        excerpt_tag = art.find("div", class_="entry-summary") \
-                   or art.find("div", class_="td-excerpt") \
-                   or art.find("p")
-        excerpt = excerpt_tag.get_text(strip=True) if excerpt_tag else ""
+    def first(node, selectors):
+        for selector in selectors:
+            found = node.css_first(selector)
+            if found is not None:
+                return found
+        return None
 
+    articles: List[Dict[str, str]] = []
+    for art in HTMLParser(html).css("article"):
+        header = art.css_first(TITLE_HEADER_SELECTOR)
+        link = (header if header is not None else art).css_first(LINK_SELECTOR)
+        href = link.attributes.get("href") if link is not None else None
+        if not href:
+            continue
+        date_tag = first(art, DATE_SELECTORS)
+        excerpt_tag = first(art, EXCERPT_SELECTORS)
         articles.append({
-            "title": title,
-            "url": url,
-            "date": date_str,
-            "excerpt": excerpt,
+            "title": link.text(strip=True),
+            "url": href,
+            "date": date_tag.text(strip=True) if date_tag else "",
+            "excerpt": excerpt_tag.text(strip=True) if excerpt_tag else "",
         })
-
     return articles
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+def resolve_parser(name: str = "auto") -> str:
+    """Pick the fastest installed backend for "auto"."""
+    if name != "auto":
+        return name
+    if _installed("selectolax"):
+        return "selectolax"
+    if _installed("lxml"):
+        return "lxml"
+    return "html.parser"
+
+# backend -> module it needs (html.parser ships with Python)
+PARSER_MODULES = {"selectolax": "selectolax", "lxml": "lxml", "html.parser": None}
+
+def validate_parser(name: str = settings.ARTICLES_PARSER) -> str:
+    """
+    Resolve the configured backend and check it is installed, so a bad
+    ARTICLES_PARSER fails at startup rather than on the first request.
+    """
+    parser = resolve_parser(name)
+    module = PARSER_MODULES[parser]
+    if module is not None and not _installed(module):
+        raise RuntimeError(f"ARTICLES_PARSER={name!r} needs {module}, which is not installed")
+    return parser
+
+def parse_articles(html: str, parser: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    Extract the article cards of a category page. CPU-bound: call it through
+    asyncio.to_thread from async code.
+    """
+    parser = resolve_parser(parser or settings.ARTICLES_PARSER)
+    if parser == "selectolax":
+        return _parse_with_selectolax(html)
+    return _parse_with_soup(html, parser)
+
+class ArticlesCache:
+    """
+    Stale-while-revalidate cache of the parsed articles feed.
+
+    A fresh copy is served as is; a stale one is served immediately while a
+    single background refresh runs. Refreshes are conditional (ETag /
+    Last-Modified) and concurrent callers share one in-flight fetch. When
+    the upstream fails, the last good copy keeps being served.
+    """
+    def __init__(self, url: str, ttl_seconds: float, refresh_interval: float):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.refresh_interval = refresh_interval
+        self.articles: Optional[List[Dict[str, str]]] = None
+        self.fetched_at = 0.0
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._scheduler: Optional[asyncio.Task] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return (
+            self.articles is not None
+            and time.monotonic() - self.fetched_at < self.ttl_seconds
+        )
+
+    async def get(self) -> List[Dict[str, str]]:
+        if self.articles is None:
+            await self.refresh()
+        elif not self.is_fresh:
+            self._refresh_in_background()
+        return self.articles
+
+    def _refresh_in_background(self) -> None:
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._fetch())
+            # keep failures of unawaited refreshes out of the event loop log
+            self._inflight.add_done_callback(
+                lambda t: t.cancelled() or t.exception()
+            )
+
+    async def refresh(self) -> None:
+        """Single-flight refresh: join the running fetch or start one."""
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._fetch())
+        await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> None:
+        try:
+            if self._client is None:
+                self._client = httpx.AsyncClient(headers=HEADERS, timeout=10.0)
+            headers = {}
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+            try:
+                with track("articles_fetch"):
+                    resp = await self._client.get(self.url, headers=headers)
+                if resp.status_code != 304:
+                    resp.raise_for_status()
+            except httpx.HTTPError as e:
+                if self.articles is None:
+                    raise RuntimeError(f"Failed to fetch articles: {e}") from e
+                logger.warning("Articles refresh failed, serving last copy: %s", e)
+                return
+
+            if resp.status_code != 304 or self.articles is None:
+                # parse off the event loop
+                try:
+                    with track("articles_parse"):
+                        articles = await asyncio.to_thread(parse_articles, resp.text)
+                except Exception as e:
+                    if self.articles is None:
+                        raise RuntimeError(f"Failed to parse articles: {e}") from e
+                    logger.warning("Articles parse failed, serving last copy: %s", e)
+                    return
+                self.articles = articles
+                self.etag = resp.headers.get("ETag")
+                self.last_modified = resp.headers.get("Last-Modified")
+            self.fetched_at = time.monotonic()
+        finally:
+            self._inflight = None
+
+    async def _run_scheduler(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Scheduled articles refresh failed: %s", e)
+            await asyncio.sleep(self.refresh_interval)
+
+    async def start(self) -> None:
+        if self.refresh_interval > 0:
+            self._scheduler = asyncio.create_task(self._run_scheduler())
+
+    async def stop(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            try:
+                await self._scheduler
+            except asyncio.CancelledError:
+                pass
+            self._scheduler = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+articles_cache = ArticlesCache(
+    STEEA_URL,
+    ttl_seconds=settings.ARTICLES_TTL_SECONDS,
+    refresh_interval=settings.ARTICLES_REFRESH_INTERVAL_SECONDS,
+)
+
+async def fetch_latest_articles() -> List[Dict[str, str]]:
+    return await articles_cache.get()
@@ -1,11 +1,11 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_password_async, create_access_token
 from app.services.user import get_user_by_username
 
 async def authenticate_user(db: AsyncSession, username: str, password: str):
     user = await get_user_by_username(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
@@ -17,5 +17,11 @@ async def login(db: AsyncSession, username: str, password: str) -> str:
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    token_data = {"sub": str(user.id), "role_id": user.role_id, "company_id": user.company_id}
+    token_data = {
+        "sub": str(user.id),
+        "role_id": user.role_id,
+        "company_id": user.company_id,
+        "username": user.username,
+        "email": user.email,
+    }
     return create_access_token(data=token_data)
@@ -1,22 +1,57 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, extract
-from typing import List
-from datetime import date
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from fastapi import HTTPException, status
+from typing import AbstractSet, List, AsyncIterator, Optional, Tuple
+from datetime import date, datetime, timedelta
+import base64
+import json
 from app.models.booking import Booking, BookingStatus
-from app.models.user import User
+from app.models.vehicle import Vehicle
+from app.services.rollup import apply_booking_delta, apply_booking_deltas, rollup_day
+from app.services.report import booking_report
+from app.services.outbox import add_booking_event, outbox_dispatcher
+from app.services.versions import BOOKINGS, bump_version
+from app.db.session import async_session
 from app.schemas.booking import (
-    BookingCreate, BookingFilter,
+    BookingCreate, BookingFilter, BookingRead, BookingReadExpanded,
     EarningsReport, CountReport, ReportParams
 )
+from app.schemas.user import UserSummary
+from app.schemas.vehicle import VehicleSummary
 
-async def list_bookings(
-    db: AsyncSession,
-    current_user,
-    filters: BookingFilter
-) -> List[Booking]:
-    stmt = select(Booking).join(User, Booking.driver)
-    stmt = stmt.where(User.company_id == current_user.company_id)
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 1000
+BOOKING_OVERLAP_CONSTRAINT = "ex_bookings_vehicle_id_period"
+VEHICLE_BOOKED_DETAIL = "Vehicle is already booked for this time"
+# relations that ?expand= may include, all many-to-one
+BOOKING_EXPANSIONS = {"driver": Booking.driver, "vehicle": Booking.vehicle}
+# BookingRead fields as columns, for the row-based list path
+BOOKING_READ_COLUMNS = [Booking.__table__.c[name] for name in BookingRead.model_fields]
+
+def encode_cursor(pickup_time: datetime, booking_id: int) -> str:
+    raw = f"{pickup_time.isoformat()}|{booking_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        pickup, booking_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(pickup), int(booking_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def apply_booking_filters(stmt, current_user, filters: BookingFilter):
+    """
+    Apply tenant/role scoping, the listing filters and keyset ordering
+    (newest pickup first, id as tie-breaker) to a bookings select.
+    """
+    stmt = stmt.where(Booking.company_id == current_user.company_id)
     if current_user.role_id != 1:
         stmt = stmt.where(Booking.driver_id == current_user.id)
     if filters.status:
@@ -24,25 +59,144 @@ async def list_bookings(
     if filters.date_from:
         stmt = stmt.where(Booking.pickup_time >= filters.date_from)
     if filters.date_to:
-        stmt = stmt.where(Booking.pickup_time <= filters.date_to)
+        # half-open [date_from, date_to + 1 day): date_to is inclusive
+        stmt = stmt.where(
+            Booking.pickup_time < filters.date_to + timedelta(days=1)
+        )
+    if filters.cursor:
+        pickup_time, booking_id = decode_cursor(filters.cursor)
+        stmt = stmt.where(or_(
+            Booking.pickup_time < pickup_time,
+            and_(Booking.pickup_time == pickup_time, Booking.id < booking_id),
+        ))
+    return stmt.order_by(Booking.pickup_time.desc(), Booking.id.desc())
+
+async def list_bookings(
+    db: AsyncSession,
+    current_user,
+    filters: BookingFilter,
+    expand: AbstractSet[str] = frozenset()
+) -> Tuple[List[Booking], Optional[str]]:
+    """
+    Return one page of bookings and the cursor of the next page
+    (None once the history is exhausted). Relations named in `expand` are
+    joined into the same query.
+    """
+    limit = min(max(filters.limit, 1), MAX_PAGE_SIZE)
+    # fetch one extra row to know whether another page exists
+    stmt = apply_booking_filters(select(Booking), current_user, filters).limit(limit + 1)
+    stmt = stmt.options(*(joinedload(BOOKING_EXPANSIONS[name]) for name in expand))
     result = await db.execute(stmt)
-    return result.scalars().all()
+    bookings = result.scalars().all()
+    next_cursor = None
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        last = bookings[-1]
+        next_cursor = encode_cursor(last.pickup_time, last.id)
+    return bookings, next_cursor
+
+async def list_booking_rows(
+    db: AsyncSession,
+    current_user,
+    filters: BookingFilter
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    The page of `list_bookings` as plain dicts of the BookingRead fields,
+    fetched as row tuples: no ORM objects, ready for FastJSONResponse.
+    """
+    limit = min(max(filters.limit, 1), MAX_PAGE_SIZE)
+    stmt = apply_booking_filters(select(*BOOKING_READ_COLUMNS), current_user, filters)
+    result = await db.execute(stmt.limit(limit + 1))
+    keys = list(result.keys())
+    rows = [dict(zip(keys, row)) for row in result]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["pickup_time"], last["id"])
+    return rows, next_cursor
+
+def booking_read(booking: Booking, expand: AbstractSet[str]) -> BookingReadExpanded:
+    """
+    Serialize a booking with the relations named in `expand`. Only those
+    are touched: any other would lazy-load, which AsyncSession can't do.
+    """
+    data = BookingRead.from_orm(booking).dict()
+    if "driver" in expand:
+        data["driver"] = UserSummary.from_orm(booking.driver)
+    if "vehicle" in expand:
+        data["vehicle"] = VehicleSummary.from_orm(booking.vehicle)
+    return BookingReadExpanded(**data)
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def stream_bookings(
+    current_user,
+    filters: BookingFilter,
+    session_factory=async_session
+) -> AsyncIterator[bytes]:
+    """
+    Stream the filtered booking history as NDJSON, one chunk per
+    server-side cursor batch, without materialising ORM objects.
+
+    The query is built eagerly so a bad cursor fails before the response
+    starts; the generator opens its own session because request-scoped
+    sessions are closed before a StreamingResponse body is sent.
+    """
+    columns = [c for c in Booking.__table__.c if c.name != "period"]
+    stmt = apply_booking_filters(select(*columns), current_user, filters)
+    stmt = stmt.execution_options(yield_per=STREAM_CHUNK_SIZE)
+
+    async def chunks() -> AsyncIterator[bytes]:
+        async with session_factory() as db:
+            result = await db.stream(stmt)
+            async for rows in result.mappings().partitions():
+                yield "".join(
+                    json.dumps(dict(row), default=_json_default) + "\n"
+                    for row in rows
+                ).encode()
+
+    return chunks()
 
 async def create_booking(
     db: AsyncSession,
     booking_in: BookingCreate,
-    current_user,
-    manager
+    current_user
 ) -> Booking:
-    booking = Booking(**booking_in.dict(), driver_id=current_user.id)
+    vehicle = await db.scalar(select(Vehicle.id).where(
+        Vehicle.id == booking_in.vehicle_id,
+        Vehicle.company_id == current_user.company_id
+    ))
+    if vehicle is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Vehicle not found")
+    booking = Booking(
+        **booking_in.dict(),
+        driver_id=current_user.id,
+        company_id=current_user.company_id
+    )
     db.add(booking)
-    await db.commit()
+    # flushed before the rollup upsert, which would otherwise autoflush the
+    # INSERT outside this try; id and created_at are also needed by the
+    # event written in this transaction
+    try:
+        await db.flush()
+    except IntegrityError as e:
+        await db.rollback()
+        if BOOKING_OVERLAP_CONSTRAINT in str(e.orig):
+            raise HTTPException(status.HTTP_409_CONFLICT, VEHICLE_BOOKED_DETAIL)
+        raise
+    await apply_booking_delta(
+        db, booking.company_id, booking.driver_id, booking.status,
+        booking.pickup_time, 1, booking.price
+    )
     await db.refresh(booking)
-    from app.schemas.booking import BookingRead
-    await manager.broadcast({
-        'event': 'new_booking',
-        'booking': BookingRead.from_orm(booking).dict()
-    })
+    add_booking_event(db, 'new_booking', booking)
+    await bump_version(db, booking.company_id, BOOKINGS)
+    await db.commit()
+    outbox_dispatcher.wake()
     return booking
 
 async def earnings_report(
@@ -50,109 +204,39 @@ async def earnings_report(
     current_user,
     params: ReportParams
 ) -> List[EarningsReport]:
-    # Base completed bookings scoped
-    base = select(Booking).join(User, Booking.driver).where(
-        Booking.status == BookingStatus.completed,
-        User.company_id == current_user.company_id
-    )
-    if current_user.role_id != 1:
-        base = base.where(Booking.driver_id == current_user.id)
-
-    # All-time
-    if not params.timeframe:
-        res = await db.execute(
-            select(func.sum(Booking.price).label('total'))
-            .select_from(Booking).join(User, Booking.driver)
-            .where(
-                Booking.status == BookingStatus.completed,
-                User.company_id == current_user.company_id
-            )
-        )
-        total = res.scalar() or 0
-        return [EarningsReport(period='all_time', total=total)]
-
-    # Yearly reports
-    if params.timeframe == 'yearly':
-        if params.year:
-            # monthly breakdown for given year
-            stmt = select(
-                extract('month', Booking.pickup_time).label('period'),
-                func.sum(Booking.price).label('total')
-            ).select_from(Booking).join(User, Booking.driver)
-            stmt = stmt.where(
-                Booking.status == BookingStatus.completed,
-                User.company_id == current_user.company_id,
-                extract('year', Booking.pickup_time) == params.year
-            ).group_by('period')
-        else:
-            # annual totals
-            stmt = select(
-                extract('year', Booking.pickup_time).label('period'),
-                func.sum(Booking.price).label('total')
-            ).select_from(Booking).join(User, Booking.driver)
-            stmt = stmt.where(
-                Booking.status == BookingStatus.completed,
-                User.company_id == current_user.company_id
-            ).group_by('period')
-    # Monthly reports
-    elif params.timeframe == 'monthly' and params.year and params.month:
-        stmt = select(
-            extract('week', Booking.pickup_time).label('period'),
-            func.sum(Booking.price).label('total')
-        ).select_from(Booking).join(User, Booking.driver)
-        stmt = stmt.where(
-            Booking.status == BookingStatus.completed,
-            User.company_id == current_user.company_id,
-            extract('year', Booking.pickup_time) == params.year,
-            extract('month', Booking.pickup_time) == params.month
-        ).group_by('period')
-    # Weekly reports
-    elif params.timeframe == 'weekly' and params.year and params.month and params.day:
-        stmt = select(
-            func.date(Booking.pickup_time).label('period'),
-            func.sum(Booking.price).label('total')
-        ).select_from(Booking).join(User, Booking.driver)
-        stmt = stmt.where(
-            Booking.status == BookingStatus.completed,
-            User.company_id == current_user.company_id,
-            func.date(Booking.pickup_time) == params.day
-        ).group_by('period')
-    else:
-        return []
-
-    res = await db.execute(stmt)
-    return [EarningsReport(period=str(int(r.period)), total=r.total or 0) for r in res.all()]
+    return [
+        EarningsReport(period=r.period, total=r.total)
+        for r in await booking_report(db, current_user, params)
+    ]
 
 async def count_report(
     db: AsyncSession,
     current_user,
     params: ReportParams
 ) -> List[CountReport]:
-    # All-time
-    if not params.timeframe:
-        res = await db.execute(
-            select(func.count().label('count'))
-            .select_from(Booking).join(User, Booking.driver)
-            .where(User.company_id == current_user.company_id)
-        )
-        total = res.scalar() or 0
-        return [CountReport(period='all_time', count=total)]
-
-    # mimic earnings grouping but count
-    rows: List[CountReport] = []
-    # implement as needed
-    return rows
+    return [
+        CountReport(period=r.period, count=r.count)
+        for r in await booking_report(db, current_user, params)
+    ]
 
 async def get_booking(
     db: AsyncSession,
     booking_id: int,
-    current_user
+    current_user,
+    for_update: bool = False
 ) -> Booking | None:
-    stmt = select(Booking).where(Booking.id == booking_id)
-    stmt = stmt.join(User, Booking.driver)
-    stmt = stmt.where(User.company_id == current_user.company_id)
+    """
+    `for_update` locks the row until the transaction ends and reloads it,
+    so a read-modify-write sees the latest committed values.
+    """
+    stmt = select(Booking).where(
+        Booking.id == booking_id,
+        Booking.company_id == current_user.company_id
+    )
     if current_user.role_id != 1:
         stmt = stmt.where(Booking.driver_id == current_user.id)
+    if for_update:
+        stmt = stmt.with_for_update().execution_options(populate_existing=True)
     res = await db.execute(stmt)
     return res.scalars().first()
 
@@ -160,22 +244,28 @@ async def update_booking_status(
     db: AsyncSession,
     booking_id: int,
     new_status: BookingStatus,
-    current_user,
-    manager
+    current_user
 ) -> Booking:
-    booking = await get_booking(db, booking_id, current_user)
+    # locked: concurrent status changes must not both move the booking
+    # out of the same old_status rollup
+    booking = await get_booking(db, booking_id, current_user, for_update=True)
     if not booking:
         return None
     if current_user.role_id != 1 and booking.driver_id != current_user.id:
         return None
+    old_status = booking.status
     booking.status = new_status
     db.add(booking)
+    if old_status != new_status:
+        # move the booking between status rollups in the same transaction;
+        # one ordered upsert, so opposite moves lock both rows in one order
+        day = rollup_day(booking.pickup_time)
+        await apply_booking_deltas(db, booking.company_id, {
+            (booking.driver_id, old_status, day): (-1, -booking.price),
+            (booking.driver_id, new_status, day): (1, booking.price),
+        })
+    add_booking_event(db, 'update_booking', booking)
+    await bump_version(db, booking.company_id, BOOKINGS)
     await db.commit()
-    await db.refresh(booking)
-    # broadcast update
-    from app.schemas.booking import BookingRead
-    await manager.broadcast({
-        'event': 'update_booking',
-        'booking': BookingRead.from_orm(booking).dict()
-    })
-    return booking
\ No newline at end of file
+    outbox_dispatcher.wake()
+    return booking
@@ -0,0 +1,232 @@
+"""
+Bulk booking import.
+
+Uploads (a JSON array, NDJSON or CSV) are read row by row and handled in
+batches of BULK_IMPORT_BATCH_SIZE: each batch is validated, its vehicles
+are checked with one query, valid rows go in with one multi-row
+INSERT ... ON CONFLICT DO NOTHING RETURNING (rows clashing with another
+booking of the vehicle are skipped) together with one rollup upsert and
+one aggregated event, and the batch is committed. Invalid rows are
+skipped and reported with their position instead of failing the upload.
+"""
+import csv
+import json
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.models.booking import Booking
+from app.models.vehicle import Vehicle
+from app.schemas.booking import BookingCreate, BulkImportResult, BulkRowError
+from app.services.outbox import add_event, outbox_dispatcher
+from app.services.rollup import apply_booking_deltas, rollup_day
+from app.services.versions import BOOKINGS, bump_version
+
+# (row number, parsed object or None, parse error or None)
+RawRow = Tuple[int, Optional[object], Optional[str]]
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode()
+    if buffer:
+        yield buffer.decode()
+
+async def json_rows(items: Iterable) -> AsyncIterator[RawRow]:
+    for row, item in enumerate(items, start=1):
+        yield row, item, None
+
+async def ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[RawRow]:
+    row = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            yield row, json.loads(line), None
+        except ValueError as e:
+            yield row, None, f"invalid JSON: {e}"
+
+class _LineQueue:
+    """Iterator over the lines fed so far, so one csv.reader can span chunks."""
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+async def csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[RawRow]:
+    """
+    CSV with a header row; empty cells are treated as missing values.
+    Quoted fields may contain newlines (RFC 4180): lines are queued until
+    the quotes of the record balance, then read by a single csv.reader.
+    """
+    queue = _LineQueue()
+    reader = csv.reader(queue)
+    header = None
+    row = 0
+    quotes = 0
+    async for line in _lines(chunks):
+        queue.lines.append(line + "\n")
+        quotes += line.count('"')
+        if quotes % 2:
+            continue  # inside a quoted field: the record goes on
+        quotes = 0
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            queue.lines.clear()
+            if header is not None:
+                row += 1
+                yield row, None, f"invalid CSV: {e}"
+            continue
+        if not values or (len(values) == 1 and not values[0].strip()):
+            continue
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, {k: v if v != "" else None for k, v in zip(header, values)}, None
+    if queue.lines and header is not None:
+        yield row + 1, None, "invalid CSV: unterminated quoted field"
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _error_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}"
+        for e in error.errors()
+    ]
+
+def _fail(result: BulkImportResult, row: int, errors: List[str]) -> None:
+    result.failed += 1
+    if len(result.errors) < settings.BULK_IMPORT_MAX_ERRORS:
+        result.errors.append(BulkRowError(row=row, errors=errors))
+
+async def _owned_vehicles(db: AsyncSession, vehicle_ids, current_user) -> set:
+    stmt = select(Vehicle.id).where(
+        Vehicle.id.in_(vehicle_ids),
+        Vehicle.company_id == current_user.company_id
+    )
+    if current_user.role_id != 1:
+        stmt = stmt.where(Vehicle.driver_id == current_user.id)
+    return set((await db.execute(stmt)).scalars().all())
+
+async def _import_batch(
+    db: AsyncSession,
+    batch: List[RawRow],
+    current_user,
+    result: BulkImportResult
+) -> None:
+    valid: List[Tuple[int, BookingCreate]] = []
+    for row, data, error in batch:
+        if error is not None:
+            _fail(result, row, [error])
+        elif not isinstance(data, dict):
+            _fail(result, row, ["expected an object"])
+        else:
+            try:
+                valid.append((row, BookingCreate(**data)))
+            except ValidationError as e:
+                _fail(result, row, _error_messages(e))
+
+    owned = await _owned_vehicles(db, {b.vehicle_id for _, b in valid}, current_user)
+    candidates: List[Tuple[int, BookingCreate]] = []
+    for row, booking in valid:
+        if booking.vehicle_id in owned:
+            candidates.append((row, booking))
+        else:
+            _fail(result, row, ["vehicle_id: vehicle not found"])
+    if not candidates:
+        return
+
+    values = [
+        {
+            **booking.dict(),
+            "driver_id": current_user.id,
+            "company_id": current_user.company_id,
+        }
+        for _, booking in candidates
+    ]
+    # rows overlapping an existing booking of their vehicle (or an earlier
+    # row of the upload) are skipped by the exclusion constraint
+    stmt = pg_insert(Booking).on_conflict_do_nothing().returning(
+        Booking.vehicle_id, Booking.pickup_time, Booking.status, Booking.price
+    )
+    try:
+        inserted = (await db.execute(stmt, values)).all()
+        deltas: Dict[tuple, Tuple[int, int]] = {}
+        for _, pickup_time, booking_status, price in inserted:
+            key = (current_user.id, booking_status, rollup_day(pickup_time))
+            count, total = deltas.get(key, (0, 0))
+            deltas[key] = (count + 1, total + price)
+        await apply_booking_deltas(db, current_user.company_id, deltas)
+        if inserted:
+            # one event per batch; subscribers refetch the range they care about
+            add_event(db, current_user.company_id, current_user.id, {
+                'event': 'bookings_imported',
+                'count': len(inserted),
+                'pickup_from': min(r.pickup_time for r in inserted),
+                'pickup_to': max(r.pickup_time for r in inserted),
+            })
+            await bump_version(db, current_user.company_id, BOOKINGS)
+        await db.commit()
+    except IntegrityError:
+        # e.g. a vehicle deleted meanwhile: the whole batch is rolled back
+        await db.rollback()
+        for row, _ in candidates:
+            _fail(result, row, ["rejected by the database"])
+        return
+
+    # match inserted rows back to the upload to report the skipped ones
+    landed = Counter((r.vehicle_id, _utc(r.pickup_time)) for r in inserted)
+    for row, booking in candidates:
+        key = (booking.vehicle_id, _utc(booking.pickup_time))
+        if landed[key]:
+            landed[key] -= 1
+        else:
+            _fail(result, row, ["vehicle is already booked for this time"])
+    result.inserted += len(inserted)
+    if inserted:
+        outbox_dispatcher.wake()
+
+async def import_bookings(
+    db: AsyncSession,
+    rows: AsyncIterator[RawRow],
+    current_user,
+    batch_size: int = settings.BULK_IMPORT_BATCH_SIZE
+) -> BulkImportResult:
+    """
+    Import bookings for the current user. Each batch commits on its own, so
+    rows of earlier batches stay imported if a later one fails.
+    """
+    result = BulkImportResult(inserted=0, failed=0, errors=[])
+    batch: List[RawRow] = []
+    async for raw in rows:
+        batch.append(raw)
+        if len(batch) >= batch_size:
+            await _import_batch(db, batch, current_user, result)
+            batch = []
+    if batch:
+        await _import_batch(db, batch, current_user, result)
+    result.errors.sort(key=lambda e: e.row)
+    return result
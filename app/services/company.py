@@ -1,7 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from app.core.security import get_password_hash_async
 from app.models.company import Company
+from app.models.user import User
 from app.schemas.company import CompanyCreate
+from app.schemas.user import RegisterCompanyUser
+from app.services.role import get_role_id
+from app.services.user import commit_or_400
 
 async def list_companies(db: AsyncSession) -> list[Company]:
     result = await db.execute(select(Company))
@@ -13,3 +18,24 @@ async def create_company(db: AsyncSession, company_in: CompanyCreate) -> Company
     await db.commit()
     await db.refresh(company)
     return company
+
+async def register_company(db: AsyncSession, reg_in: RegisterCompanyUser) -> User:
+    """
+    Create a company and its first Admin in one transaction. Duplicate
+    company names, usernames and emails are rejected by the unique
+    constraints, so concurrent signups can't both succeed and a failure
+    never leaves a company without its admin.
+    """
+    admin_role_id = await get_role_id(db, "Admin")
+    hashed_pw = await get_password_hash_async(reg_in.password)
+    company = Company(name=reg_in.company_name, address=None)
+    user = User(
+        username=reg_in.username,
+        email=reg_in.email,
+        hashed_password=hashed_pw,
+        role_id=admin_role_id,
+        company=company,
+    )
+    db.add_all([company, user])
+    await commit_or_400(db, company_name=reg_in.company_name)
+    return user
@@ -0,0 +1,121 @@
+"""
+Bulk export of bookings for accounting.
+
+Rows come straight off a server-side cursor as plain tuples (no ORM objects
+or Pydantic models) and are encoded one batch at a time, so memory stays
+flat however many rows are exported. Parquet is offered when pyarrow is
+installed.
+"""
+import csv
+import io
+from typing import AsyncIterator, List
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.booking import Booking
+from app.schemas.booking import BookingFilter
+from app.services.booking import apply_booking_filters
+
+EXPORT_COLUMNS = (
+    "id", "driver_id", "vehicle_id", "status", "pickup_time", "dropoff_time",
+    "origin", "destination", "price", "created_at",
+)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+def export_formats() -> List[str]:
+    return ["csv", "parquet"] if pyarrow is not None else ["csv"]
+
+def _encode_csv(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    # status is the only non-scalar column: write the enum's value
+    writer.writerows((*r[:3], r[3].value, *r[4:]) for r in rows)
+    return buffer.getvalue().encode()
+
+class _ParquetSink:
+    """Write-only file object for ParquetWriter; `drain()` empties it."""
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _parquet_schema():
+    return pyarrow.schema([
+        ("id", pyarrow.int64()),
+        ("driver_id", pyarrow.int64()),
+        ("vehicle_id", pyarrow.int64()),
+        ("status", pyarrow.string()),
+        ("pickup_time", pyarrow.timestamp("us", tz="UTC")),
+        ("dropoff_time", pyarrow.timestamp("us", tz="UTC")),
+        ("origin", pyarrow.string()),
+        ("destination", pyarrow.string()),
+        ("price", pyarrow.int64()),
+        ("created_at", pyarrow.timestamp("us", tz="UTC")),
+    ])
+
+def export_bookings(
+    current_user,
+    filters: BookingFilter,
+    fmt: str = "csv",
+    session_factory=async_session
+) -> AsyncIterator[bytes]:
+    """Stream every booking matching `filters` (ignoring limit) as `fmt`."""
+    columns = [getattr(Booking, c) for c in EXPORT_COLUMNS]
+    stmt = apply_booking_filters(select(*columns), current_user, filters)
+    stmt = stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+
+    async def csv_chunks() -> AsyncIterator[bytes]:
+        async with session_factory() as db:
+            result = await db.stream(stmt)
+            header = True
+            async for rows in result.tuples().partitions():
+                yield _encode_csv(rows, header)
+                header = False
+            if header:
+                yield _encode_csv([], header)
+
+    async def parquet_chunks() -> AsyncIterator[bytes]:
+        schema = _parquet_schema()
+        sink = _ParquetSink()
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+        async with session_factory() as db:
+            result = await db.stream(stmt)
+            async for rows in result.tuples().partitions():
+                # one row group per batch
+                by_column = list(zip(*rows))
+                by_column[3] = [s.value for s in by_column[3]]
+                writer.write_batch(
+                    pyarrow.record_batch(by_column, schema=schema)
+                )
+                yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+    return parquet_chunks() if fmt == "parquet" else csv_chunks()
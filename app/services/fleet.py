@@ -0,0 +1,211 @@
+"""
+Which vehicles of a company are free during a time window.
+
+`available_vehicles` answers with one anti-join: the company's vehicles
+with no booking overlapping the window, each probe served by the GiST
+index of the bookings overlap constraint. When AVAILABILITY_CACHE_ENABLED
+is set, windows starting within the cache horizon are answered from
+`FleetScheduleCache` instead, an in-memory copy of each company's recent
+and upcoming schedule kept up to date from booking and vehicle events.
+"""
+import asyncio
+import json
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+from fastapi import HTTPException, status
+from sqlalchemy import exists, func, not_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.booking import Booking
+from app.models.vehicle import Vehicle
+from app.schemas.vehicle import VehicleRead
+from app.services.vehicle import as_utc
+
+class VehicleSchedule:
+    """
+    Busy intervals of one vehicle sorted by start. The exclusion constraint
+    guarantees they are disjoint, so two parallel sorted lists searched
+    with bisect are enough (no interval tree needed).
+    """
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+
+    def add(self, start: datetime, end: datetime) -> None:
+        i = bisect_left(self.starts, start)
+        if i < len(self.starts) and self.starts[i] == start:
+            return  # already known (event replayed or seen while loading)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        # only the last interval starting before `end` can reach into it
+        i = bisect_left(self.starts, end) - 1
+        if i < 0:
+            return True
+        busy_from, busy_to = self.starts[i], self.ends[i]
+        if busy_from == busy_to:
+            return busy_from < start  # a booking without dropoff: one instant
+        return busy_to <= start
+
+class CompanySchedule:
+    def __init__(self, covers_from: datetime, vehicles: List[VehicleRead]):
+        self.covers_from = covers_from
+        self.loaded_at = time.monotonic()
+        self.vehicles = vehicles
+        self.schedules: Dict[int, VehicleSchedule] = {v.id: VehicleSchedule() for v in vehicles}
+
+    def add(self, vehicle_id: int, start: datetime, end: datetime) -> None:
+        schedule = self.schedules.get(vehicle_id)
+        if schedule is not None and end >= self.covers_from:
+            schedule.add(start, end)
+
+    def available(self, start: datetime, end: datetime) -> List[VehicleRead]:
+        return [v for v in self.vehicles if self.schedules[v.id].is_free(start, end)]
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+class FleetScheduleCache:
+    """
+    Schedules load from the primary: a booking whose event arrived before
+    the load started must already be visible to it, which a lagging
+    replica can't promise.
+    """
+    def __init__(self, horizon: timedelta, ttl_seconds: float, session_factory=async_session):
+        self.horizon = horizon
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+        self._companies: Dict[int, CompanySchedule] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # events seen while a company is loading, applied once it is
+        self._pending: Dict[int, List[dict]] = {}
+        # companies invalidated while loading: that load is not kept
+        self._stale: Set[int] = set()
+        self.hits = 0
+        self.loads = 0
+
+    async def get(self, company_id: int) -> CompanySchedule:
+        lock = self._locks.setdefault(company_id, asyncio.Lock())
+        async with lock:
+            schedule = self._companies.get(company_id)
+            if schedule is None or time.monotonic() - schedule.loaded_at >= self.ttl_seconds:
+                async with self.session_factory() as db:
+                    schedule = await self._load(db, company_id)
+            else:
+                self.hits += 1
+            return schedule
+
+    async def _load(self, db: AsyncSession, company_id: int) -> CompanySchedule:
+        self.loads += 1
+        self._pending[company_id] = []
+        try:
+            covers_from = datetime.now(timezone.utc) - self.horizon
+            vehicles = await db.execute(
+                select(Vehicle).where(Vehicle.company_id == company_id).order_by(Vehicle.id)
+            )
+            schedule = CompanySchedule(
+                covers_from,
+                [VehicleRead.from_orm(v) for v in vehicles.scalars().all()],
+            )
+            busy = await db.execute(
+                select(Booking.vehicle_id, func.lower(Booking.period), func.upper(Booking.period))
+                .where(
+                    Booking.company_id == company_id,
+                    Booking.period.overlaps(func.tstzrange(covers_from, None)),
+                    not_(func.isempty(Booking.period)),
+                )
+            )
+            for vehicle_id, start, end in busy:
+                schedule.add(vehicle_id, start, end)
+            for booking in self._pending[company_id]:
+                self._apply(schedule, booking)
+            if company_id not in self._stale:
+                self._companies[company_id] = schedule
+            return schedule
+        finally:
+            del self._pending[company_id]
+            self._stale.discard(company_id)
+
+    def _apply(self, schedule: CompanySchedule, booking: dict) -> None:
+        start = _parse_time(booking["pickup_time"])
+        end = _parse_time(booking.get("dropoff_time")) or start
+        if end == start and booking.get("dropoff_time"):
+            return  # empty range: never overlaps anything
+        schedule.add(booking["vehicle_id"], start, end)
+
+    def on_event(self, text: str, company_id: int) -> None:
+        """Booking and vehicle event listener, registered on the websocket manager."""
+        message = json.loads(text)
+        event = message.get("event")
+        if event == "new_booking":
+            if company_id in self._pending:
+                self._pending[company_id].append(message["booking"])
+            elif company_id in self._companies:
+                self._apply(self._companies[company_id], message["booking"])
+        elif event in ("bookings_imported", "new_vehicle"):
+            # batch events carry no rows, a new vehicle changes the fleet:
+            # reload on next use
+            self.invalidate(company_id)
+
+    def invalidate(self, company_id: int) -> None:
+        self._companies.pop(company_id, None)
+        if company_id in self._pending:
+            # the load in flight may have read before the change
+            self._stale.add(company_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "companies": len(self._companies),
+            "hits": self.hits,
+            "loads": self.loads,
+        }
+
+fleet_cache: Optional[FleetScheduleCache] = (
+    FleetScheduleCache(
+        horizon=timedelta(days=settings.AVAILABILITY_CACHE_HORIZON_DAYS),
+        ttl_seconds=settings.AVAILABILITY_CACHE_TTL_SECONDS,
+    )
+    if settings.AVAILABILITY_CACHE_ENABLED else None
+)
+
+async def available_vehicles(
+    db: AsyncSession,
+    current_user,
+    start: datetime,
+    end: datetime,
+    use_cache: bool = True
+) -> List:
+    """Vehicles of the caller's company (drivers: their own) free in [start, end)."""
+    start, end = as_utc(start), as_utc(end)
+    if end <= start:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "'to' must be after 'from'")
+
+    company_id = current_user.company_id
+    cacheable = (
+        use_cache and fleet_cache is not None
+        and start >= datetime.now(timezone.utc) - fleet_cache.horizon
+    )
+    if cacheable:
+        schedule = await fleet_cache.get(company_id)
+        if start >= schedule.covers_from:
+            vehicles = schedule.available(start, end)
+            if current_user.role_id != 1:
+                vehicles = [v for v in vehicles if v.driver_id == current_user.id]
+            return vehicles
+
+    busy = exists().where(
+        Booking.vehicle_id == Vehicle.id,
+        Booking.period.overlaps(func.tstzrange(start, end)),
+    )
+    stmt = select(Vehicle).where(Vehicle.company_id == company_id, ~busy)
+    if current_user.role_id != 1:
+        stmt = stmt.where(Vehicle.driver_id == current_user.id)
+    result = await db.execute(stmt.order_by(Vehicle.id))
+    return result.scalars().all()
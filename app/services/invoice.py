@@ -0,0 +1,166 @@
+"""
+Invoice PDF rendering.
+
+reportlab is CPU-bound, so PDFs are rendered in a process pool and cached
+in memory under a hash of the booking fields printed on them: an unchanged
+booking never renders twice, and any change to those fields changes the key.
+"""
+import asyncio
+import hashlib
+import os
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from threading import Lock
+from typing import AsyncIterator, Dict, List, Optional
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.core.metrics import track
+from app.db.session import async_session
+from app.models.booking import Booking
+from app.schemas.booking import BookingFilter
+from app.services.booking import apply_booking_filters
+
+INVOICE_FIELDS = ("id", "driver_id", "vehicle_id", "price", "pickup_time", "dropoff_time")
+
+def invoice_fields(booking) -> Dict:
+    """The fields an invoice prints, from an ORM object or a row mapping."""
+    if isinstance(booking, Booking):
+        return {f: getattr(booking, f) for f in INVOICE_FIELDS}
+    return {f: booking[f] for f in INVOICE_FIELDS}
+
+def invoice_key(fields: Dict) -> str:
+    raw = "|".join(f"{f}={fields[f]!s}" for f in INVOICE_FIELDS)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def render_invoice(fields: Dict) -> bytes:
+    """Render one invoice; runs inside the process pool."""
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer)
+    p.drawString(100, 800, f"Invoice for Booking #{fields['id']}")
+    p.drawString(100, 780, f"Driver ID: {fields['driver_id']}")
+    p.drawString(100, 760, f"Vehicle ID: {fields['vehicle_id']}")
+    p.drawString(100, 740, f"Price: ${fields['price']}")
+    p.drawString(100, 720, f"Pickup: {fields['pickup_time']}")
+    p.drawString(100, 700, f"Dropoff: {fields['dropoff_time']}")
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+class InvoiceCache:
+    """LRU of rendered PDFs bounded by their total size in bytes."""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pdf
+
+    def set(self, key: str, pdf: bytes) -> None:
+        if len(pdf) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = pdf
+            self.size += len(pdf)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+invoice_cache = InvoiceCache(settings.INVOICE_CACHE_MAX_BYTES)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_pool() -> ProcessPoolExecutor:
+    # created lazily so importing the app never forks
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.INVOICE_WORKERS or os.cpu_count())
+    return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def invoice_pdf(booking) -> bytes:
+    fields = invoice_fields(booking)
+    key = invoice_key(fields)
+    pdf = invoice_cache.get(key)
+    if pdf is None:
+        loop = asyncio.get_running_loop()
+        with track("invoice_render"):
+            pdf = await loop.run_in_executor(_get_pool(), render_invoice, fields)
+        invoice_cache.set(key, pdf)
+    return pdf
+
+class _ZipStream:
+    """Write-only sink for ZipFile; `drain()` hands out what was written."""
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_invoices(
+    current_user,
+    filters: BookingFilter,
+    session_factory=async_session
+) -> AsyncIterator[bytes]:
+    """
+    Stream a ZIP of the invoices of every booking matching `filters`.
+    Bookings are read in batches from a server-side cursor and each batch
+    is rendered in parallel; only one batch of PDFs is held at a time.
+    """
+    columns = [getattr(Booking, f) for f in INVOICE_FIELDS]
+    stmt = apply_booking_filters(select(*columns), current_user, filters)
+    stmt = stmt.execution_options(yield_per=settings.INVOICE_BATCH_SIZE)
+
+    async def chunks() -> AsyncIterator[bytes]:
+        sink = _ZipStream()
+        # the sink can't seek, so ZipFile writes data descriptors instead
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            async with session_factory() as db:
+                result = await db.stream(stmt)
+                async for rows in result.mappings().partitions():
+                    pdfs = await asyncio.gather(*(invoice_pdf(r) for r in rows))
+                    for row, pdf in zip(rows, pdfs):
+                        archive.writestr(f"invoice_{row['id']}.pdf", pdf)
+                    yield sink.drain()
+        yield sink.drain()
+
+    return chunks()
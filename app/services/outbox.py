@@ -0,0 +1,172 @@
+"""
+Transactional outbox for booking and vehicle events.
+
+Services add an OutboxEvent in the same transaction as the change;
+the dispatcher running in every worker batch-reads pending rows with
+SKIP LOCKED, publishes them on the event bus and deletes them, so request
+latency no longer depends on subscribers and a crash after commit loses
+nothing (delivery is at-least-once).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from sqlalchemy import delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.core.ws import ConnectionManager, encode_message, manager
+from app.db.session import async_session
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+def add_event(
+    db: AsyncSession,
+    company_id: int,
+    driver_id: Optional[int],
+    message: dict
+) -> None:
+    """Stage an event; it is only published if the transaction commits."""
+    db.add(OutboxEvent(
+        company_id=company_id,
+        driver_id=driver_id,
+        payload=encode_message(message),
+    ))
+
+def add_booking_event(db: AsyncSession, event: str, booking) -> None:
+    from app.schemas.booking import BookingRead
+    add_event(db, booking.company_id, booking.driver_id, {
+        'event': event,
+        'booking': BookingRead.from_orm(booking).dict()
+    })
+
+def add_vehicle_event(db: AsyncSession, event: str, vehicle) -> None:
+    from app.schemas.vehicle import VehicleRead
+    add_event(db, vehicle.company_id, vehicle.driver_id, {
+        'event': event,
+        'vehicle': VehicleRead.from_orm(vehicle).dict()
+    })
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        manager: ConnectionManager,
+        session_factory=async_session,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        window_seconds: float = 60.0
+    ):
+        self.manager = manager
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.window_seconds = window_seconds
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # metrics
+        self.dispatched_total = 0
+        self.batches_total = 0
+        self.failures_total = 0
+        self.lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self._recent: deque = deque()  # (monotonic time, events) per batch
+
+    def wake(self) -> None:
+        """Hint that new events were committed, skipping the idle poll."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self.dispatch_once() == self.batch_size:
+                    continue  # backlog: keep draining
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures_total += 1
+                logger.exception("Outbox dispatch failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def dispatch_once(self) -> int:
+        """Publish and delete one batch of pending events; returns its size."""
+        async with self.session_factory() as db:
+            res = await db.execute(
+                select(OutboxEvent)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = res.scalars().all()
+            if not events:
+                # nothing pending (or all of it claimed by another worker)
+                self.lag_seconds = 0.0
+                return 0
+            await self.manager.publish(
+                (e.payload, e.company_id, e.driver_id) for e in events
+            )
+            await db.execute(
+                delete(OutboxEvent).where(OutboxEvent.id.in_([e.id for e in events]))
+            )
+            await db.commit()
+
+        self._record(events)
+        return len(events)
+
+    def _record(self, events) -> None:
+        now = time.monotonic()
+        self.dispatched_total += len(events)
+        self.batches_total += 1
+        self.lag_seconds = max(
+            0.0, (datetime.now(timezone.utc) - events[0].created_at).total_seconds()
+        )
+        self.max_lag_seconds = max(self.max_lag_seconds, self.lag_seconds)
+        self._recent.append((now, len(events)))
+        while self._recent and self._recent[0][0] < now - self.window_seconds:
+            self._recent.popleft()
+
+    async def backlog(self) -> Dict[str, float]:
+        """Pending events and the age of the oldest, read from the table."""
+        async with self.session_factory() as db:
+            pending, oldest = (await db.execute(
+                select(func.count(OutboxEvent.id), func.min(OutboxEvent.created_at))
+            )).one()
+        age = 0.0
+        if oldest is not None:
+            age = max(0.0, (datetime.now(timezone.utc) - oldest).total_seconds())
+        return {"pending": pending, "oldest_pending_seconds": age}
+
+    def stats(self) -> Dict[str, float]:
+        recent = sum(n for _, n in self._recent)
+        return {
+            "dispatched_total": self.dispatched_total,
+            "batches_total": self.batches_total,
+            "failures_total": self.failures_total,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "events_per_second": recent / self.window_seconds,
+        }
+
+outbox_dispatcher = OutboxDispatcher(
+    manager,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+)
@@ -0,0 +1,111 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, extract
+from fastapi import HTTPException, status
+from typing import List, Optional, Tuple
+from datetime import date, timedelta
+from app.models.booking import BookingStatus
+from app.models.booking_rollup import BookingDailyRollup
+from app.schemas.booking import BookingReport, StatusBreakdown, ReportParams
+
+def _period_range(year: int, month: Optional[int] = None) -> Tuple[date, date]:
+    """
+    Half-open [start, end) bounds of a year or month, so range filters stay
+    index-friendly instead of wrapping the column in extract().
+    """
+    try:
+        if month is None:
+            return date(year, 1, 1), date(year + 1, 1, 1)
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid year or month"
+        )
+    return start, end
+
+def _buckets(params: ReportParams):
+    """
+    Map a timeframe to (period expression, start, end):
+      yearly  -> months of `year`, or one bucket per year
+      monthly -> ISO weeks of `year`/`month`
+      weekly  -> days of the week containing `day`
+      daily   -> `day` itself, or every day of `year`/`month`
+    Returns None when the parameters don't describe a timeframe.
+    """
+    day = BookingDailyRollup.day
+    if params.timeframe == 'yearly':
+        if params.year:
+            return (extract('month', day), *_period_range(params.year))
+        return extract('year', day), None, None
+    if params.timeframe == 'monthly' and params.year and params.month:
+        return (extract('week', day), *_period_range(params.year, params.month))
+    if params.timeframe == 'weekly' and params.day:
+        start = params.day - timedelta(days=params.day.weekday())
+        return day, start, start + timedelta(days=7)
+    if params.timeframe == 'daily':
+        if params.day:
+            return day, params.day, params.day + timedelta(days=1)
+        if params.year and params.month:
+            return (day, *_period_range(params.year, params.month))
+    return None
+
+def _period_label(period) -> str:
+    if isinstance(period, date):
+        return period.isoformat()
+    return str(int(period))
+
+async def booking_report(
+    db: AsyncSession,
+    current_user,
+    params: ReportParams
+) -> List[BookingReport]:
+    """
+    Count, completed earnings, average completed price and a per-status
+    breakdown for every period of the timeframe, in one grouped query over
+    the daily rollups. Drivers only see their own bookings.
+    """
+    rollup = BookingDailyRollup
+    columns = []
+    for s in BookingStatus:
+        columns.append(
+            func.coalesce(func.sum(rollup.booking_count).filter(rollup.status == s), 0)
+            .label(f"{s.value}_count")
+        )
+        columns.append(
+            func.coalesce(func.sum(rollup.price_total).filter(rollup.status == s), 0)
+            .label(f"{s.value}_total")
+        )
+    stmt = select(*columns).where(rollup.company_id == current_user.company_id)
+    if current_user.role_id != 1:
+        stmt = stmt.where(rollup.driver_id == current_user.id)
+
+    if params.timeframe:
+        buckets = _buckets(params)
+        if buckets is None:
+            return []
+        period, start, end = buckets
+        period = period.label('period')
+        stmt = stmt.add_columns(period).group_by(period).order_by(period)
+        if start is not None:
+            stmt = stmt.where(rollup.day >= start, rollup.day < end)
+
+    res = await db.execute(stmt)
+    reports: List[BookingReport] = []
+    for r in res.mappings().all():
+        by_status = {
+            s.value: StatusBreakdown(
+                count=r[f"{s.value}_count"], total=r[f"{s.value}_total"]
+            )
+            for s in BookingStatus
+        }
+        completed = by_status[BookingStatus.completed.value]
+        reports.append(BookingReport(
+            period=_period_label(r['period']) if params.timeframe else 'all_time',
+            count=sum(b.count for b in by_status.values()),
+            total=completed.total,
+            average_price=completed.total / completed.count if completed.count else 0,
+            by_status=by_status,
+        ))
+    return reports
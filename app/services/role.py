@@ -0,0 +1,22 @@
+from typing import Dict
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.role import Role
+
+# Roles are seeded reference data, so their ids are loaded once per worker
+_role_ids: Dict[str, int] = {}
+
+async def load_roles(db: AsyncSession) -> None:
+    result = await db.execute(select(Role.name, Role.id))
+    _role_ids.update(result.tuples().all())
+
+async def get_role_id(db: AsyncSession, name: str) -> int:
+    if name not in _role_ids:
+        await load_roles(db)
+    if name not in _role_ids:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"{name} role missing in database."
+        )
+    return _role_ids[name]
@@ -0,0 +1,141 @@
+"""
+Maintenance of the booking_daily_rollups table.
+
+Every booking write adjusts the matching rollup row inside the same
+transaction. Migration 0008 fills the table from existing bookings;
+`python -m app.services.rollup [--company-id N]` rebuilds it (repair after
+manual edits).
+"""
+import argparse
+import asyncio
+from datetime import datetime, date, timezone
+from typing import Dict, Tuple
+from sqlalchemy import delete, func, cast, String, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.booking import Booking, BookingStatus
+from app.models.booking_rollup import BookingDailyRollup
+from app.services.versions import BOOKINGS, bump_version
+
+def rollup_day(pickup_time: datetime) -> date:
+    """The UTC calendar day a booking is counted under."""
+    if pickup_time.tzinfo is not None:
+        pickup_time = pickup_time.astimezone(timezone.utc)
+    return pickup_time.date()
+
+async def apply_booking_delta(
+    db: AsyncSession,
+    company_id: int,
+    driver_id: int,
+    status: BookingStatus,
+    pickup_time: datetime,
+    count: int,
+    price: int
+) -> None:
+    """
+    Add `count` bookings worth `price` to a rollup row (negative values
+    remove them). Does not commit: callers run it in their own transaction.
+    """
+    stmt = pg_insert(BookingDailyRollup).values(
+        company_id=company_id,
+        driver_id=driver_id,
+        status=status,
+        day=rollup_day(pickup_time),
+        booking_count=count,
+        price_total=price,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["company_id", "status", "day", "driver_id"],
+        set_={
+            "booking_count": BookingDailyRollup.booking_count + stmt.excluded.booking_count,
+            "price_total": BookingDailyRollup.price_total + stmt.excluded.price_total,
+        },
+    )
+    await db.execute(stmt)
+
+async def apply_booking_deltas(
+    db: AsyncSession,
+    company_id: int,
+    deltas: Dict[Tuple[int, BookingStatus, date], Tuple[int, int]]
+) -> None:
+    """
+    Batch form of `apply_booking_delta`: one upsert for many rollup rows,
+    keyed by (driver_id, status, day) with (count, price) values. Keys must
+    be unique, as one INSERT ... ON CONFLICT can't touch a row twice.
+    Rows are written (and locked) in primary key order, so two transactions
+    touching the same rows can't deadlock on each other.
+    """
+    if not deltas:
+        return
+    ordered = sorted(
+        deltas.items(),
+        key=lambda item: (item[0][1], item[0][2], item[0][0])  # status, day, driver
+    )
+    stmt = pg_insert(BookingDailyRollup).values([
+        {
+            "company_id": company_id,
+            "driver_id": driver_id,
+            "status": status,
+            "day": day,
+            "booking_count": count,
+            "price_total": price,
+        }
+        for (driver_id, status, day), (count, price) in ordered
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["company_id", "status", "day", "driver_id"],
+        set_={
+            "booking_count": BookingDailyRollup.booking_count + stmt.excluded.booking_count,
+            "price_total": BookingDailyRollup.price_total + stmt.excluded.price_total,
+        },
+    )
+    await db.execute(stmt)
+
+async def rebuild_rollups(db: AsyncSession, company_id: int | None = None) -> None:
+    """Recompute rollups from the bookings table, for one company or all."""
+    day = func.date(func.timezone("UTC", Booking.pickup_time))
+    source = (
+        select(
+            Booking.company_id,
+            cast(Booking.status, String),
+            day,
+            Booking.driver_id,
+            func.count(),
+            func.coalesce(func.sum(Booking.price), 0),
+        )
+        .group_by(Booking.company_id, Booking.status, day, Booking.driver_id)
+    )
+    clear = delete(BookingDailyRollup)
+    if company_id is not None:
+        source = source.where(Booking.company_id == company_id)
+        clear = clear.where(BookingDailyRollup.company_id == company_id)
+        companies = [company_id]
+    else:
+        # companies left with rollups but no bookings change too
+        companies = (await db.execute(
+            select(Booking.company_id).union(select(BookingDailyRollup.company_id))
+        )).scalars().all()
+
+    await db.execute(clear)
+    await db.execute(
+        insert(BookingDailyRollup).from_select(
+            ["company_id", "status", "day", "driver_id",
+             "booking_count", "price_total"],
+            source,
+        )
+    )
+    # cached earnings and reports of these companies are now stale
+    for affected in sorted(companies):
+        await bump_version(db, affected, BOOKINGS)
+    await db.commit()
+
+async def _main(company_id: int | None) -> None:
+    from app.db.session import async_session
+    async with async_session() as db:
+        await rebuild_rollups(db, company_id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild booking rollups")
+    parser.add_argument("--company-id", type=int, default=None)
+    asyncio.run(_main(parser.parse_args().company_id))
@@ -1,10 +1,53 @@
 # File: app/services/user.py
 
+from fastapi import HTTPException, status
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
+from typing import AbstractSet
 from app.models.user import User
-from app.schemas.user import UserCreate,UserUpdate
-from app.core.security import get_password_hash
+from app.schemas.company import CompanyRead
+from app.schemas.user import UserCreate,UserUpdate, UserRead, UserReadExpanded, RoleRead
+from app.core.security import get_password_hash_async
+from app.core.principal import principal_cache
+from app.services.versions import USERS, bump_version
+
+# Constraint behind an IntegrityError -> 400 detail shown to the client.
+# Unique indexes from the models and unique constraints from the
+# migrations have different names, so both are listed.
+CONSTRAINT_ERRORS = {
+    "ix_users_username": "Username already registered.",
+    "users_username_key": "Username already registered.",
+    "ix_users_email": "Email already registered.",
+    "users_email_key": "Email already registered.",
+    "ix_companies_name": "Company '{company_name}' already registered.",
+    "companies_name_key": "Company '{company_name}' already registered.",
+    "users_role_id_fkey": "Role does not exist.",
+}
+
+def integrity_error_detail(e: IntegrityError, **context) -> str:
+    # asyncpg's exception, the cause of the DBAPI error, names the constraint
+    constraint = getattr(e.orig.__cause__, "constraint_name", None)
+    if constraint is None:
+        constraint = next((c for c in CONSTRAINT_ERRORS if c in str(e.orig)), None)
+    detail = CONSTRAINT_ERRORS.get(constraint, "Conflicting or invalid data.")
+    return detail.format(**context)
+
+async def commit_or_400(db: AsyncSession, **context) -> None:
+    """
+    Commit, relying on the database constraints for uniqueness: no
+    check-then-insert race and no extra SELECT round trips.
+    """
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=integrity_error_detail(e, **context)
+        )
 
 async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
     result = await db.execute(select(User).where(User.username == username))
@@ -19,7 +62,7 @@ async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
     return result.scalars().first()
 
 async def create_user(db: AsyncSession, user_in: UserCreate, company_id: int) -> User:
-    hashed_pw = get_password_hash(user_in.password)
+    hashed_pw = await get_password_hash_async(user_in.password)
     user = User(
         username=user_in.username,
         email=user_in.email,
@@ -28,24 +71,64 @@ async def create_user(db: AsyncSession, user_in: UserCreate, company_id: int) ->
         company_id=company_id,
     )
     db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    await bump_version(db, company_id, USERS)
+    # the INSERT returns the id and nothing else is server-generated
+    await commit_or_400(db)
     return user
+
+async def create_company_user(db: AsyncSession, user_in: UserCreate, current_user) -> User:
+    """Admin-only: add a user to the caller's company."""
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    return await create_user(db, user_in, current_user.company_id)
+
 async def update_user(db: AsyncSession, user: User) -> User:
     db.add(user)
-    await db.commit()
+    await bump_version(db, user.company_id, USERS)
+    await commit_or_400(db)
+    principal_cache.invalidate(user.id)
     await db.refresh(user)
     return user
 
 async def delete_user(db: AsyncSession, user: User) -> None:
     await db.delete(user)
+    await bump_version(db, user.company_id, USERS)
     await db.commit()
+    principal_cache.invalidate(user.id)
     return None
 
-async def get_all_users(db: AsyncSession, company_id: int) -> list[User]:
-    result = await db.execute(select(User).where(User.company_id == int(company_id)))
+# relations that ?expand= may include
+USER_EXPANSIONS = {"company": User.company, "role": User.role}
+# UserRead fields as columns, for the row-based list path
+USER_READ_COLUMNS = [User.__table__.c[name] for name in UserRead.model_fields]
+
+async def get_all_users(
+    db: AsyncSession,
+    company_id: int,
+    expand: AbstractSet[str] = frozenset()
+) -> list[User]:
+    stmt = select(User).where(User.company_id == int(company_id))
+    stmt = stmt.options(*(joinedload(USER_EXPANSIONS[name]) for name in expand))
+    result = await db.execute(stmt)
     return result.scalars().all()
 
+async def get_all_user_rows(db: AsyncSession, company_id: int) -> list[dict]:
+    """`get_all_users` as plain dicts of the UserRead fields."""
+    result = await db.execute(
+        select(*USER_READ_COLUMNS).where(User.company_id == int(company_id))
+    )
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+def user_read(user: User, expand: AbstractSet[str]) -> UserReadExpanded:
+    """Serialize a user, touching only the relations loaded for `expand`."""
+    data = UserRead.from_orm(user).dict()
+    if "company" in expand:
+        data["company"] = CompanyRead.from_orm(user.company)
+    if "role" in expand:
+        data["role"] = RoleRead.from_orm(user.role)
+    return UserReadExpanded(**data)
+
 async def update_user_admin(
     db: AsyncSession,
     user_id: int,
@@ -54,19 +137,21 @@ async def update_user_admin(
 ) -> User:
     if current_user.role_id != 1:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
-    user = await get_user(db, user_id, current_user)
-    if not user:
+    user = await get_user_by_id(db, user_id)
+    if not user or user.company_id != current_user.company_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     if user_in.username:
         user.username = user_in.username
     if user_in.email:
         user.email = user_in.email
     if user_in.password:
-        user.hashed_password = pwd_context.hash(user_in.password)
+        user.hashed_password = await get_password_hash_async(user_in.password)
     if user_in.role_id is not None:
         user.role_id = user_in.role_id
     db.add(user)
-    await db.commit()
+    await bump_version(db, user.company_id, USERS)
+    await commit_or_400(db)
+    principal_cache.invalidate(user.id)
     await db.refresh(user)
     return user
 
@@ -77,9 +162,11 @@ async def delete_user_admin(
 ) -> None:
     if current_user.role_id != 1:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
-    user = await get_user(db, user_id, current_user)
-    if not user:
+    user = await get_user_by_id(db, user_id)
+    if not user or user.company_id != current_user.company_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     await db.execute(delete(User).where(User.id == user_id))
+    await bump_version(db, current_user.company_id, USERS)
     await db.commit()
+    principal_cache.invalidate(user_id)
 
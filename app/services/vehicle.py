@@ -1,23 +1,64 @@
+from datetime import datetime, timedelta, timezone
+from typing import AbstractSet
+from fastapi import HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
+from app.models.booking import Booking
 from app.models.vehicle import Vehicle
+from app.schemas.user import UserSummary
+from app.schemas.vehicle import TimeSlot, VehicleRead, VehicleReadExpanded
+from app.services.outbox import add_vehicle_event, outbox_dispatcher
+from app.services.versions import VEHICLES, bump_version
+
+MAX_AVAILABILITY_WINDOW = timedelta(days=31)
+# relations that ?expand= may include
+VEHICLE_EXPANSIONS = {"driver": Vehicle.driver}
+# VehicleRead fields as columns, for the row-based list path
+VEHICLE_READ_COLUMNS = [Vehicle.__table__.c[name] for name in VehicleRead.model_fields]
+
+def _visible_vehicles(stmt, company_id: int, user_id: int, is_admin: bool):
+    stmt = stmt.where(Vehicle.company_id == company_id)
+    if not is_admin:
+        stmt = stmt.where(Vehicle.driver_id == user_id)
+    return stmt
 
 async def list_vehicles(
     db: AsyncSession,
     company_id: int,
     user_id: int,
-    is_admin: bool
+    is_admin: bool,
+    expand: AbstractSet[str] = frozenset()
 ) -> list[Vehicle]:
     """
     Return all vehicles for a company if admin;
     otherwise only vehicles assigned to the user.
     """
-    stmt = select(Vehicle).where(Vehicle.company_id == company_id)
-    if not is_admin:
-        stmt = stmt.where(Vehicle.driver_id == user_id)
+    stmt = _visible_vehicles(select(Vehicle), company_id, user_id, is_admin)
+    stmt = stmt.options(*(joinedload(VEHICLE_EXPANSIONS[name]) for name in expand))
     result = await db.execute(stmt)
     return result.scalars().all()
 
+async def list_vehicle_rows(
+    db: AsyncSession,
+    company_id: int,
+    user_id: int,
+    is_admin: bool
+) -> list[dict]:
+    """`list_vehicles` as plain dicts of the VehicleRead fields."""
+    stmt = _visible_vehicles(select(*VEHICLE_READ_COLUMNS), company_id, user_id, is_admin)
+    result = await db.execute(stmt)
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+def vehicle_read(vehicle: Vehicle, expand: AbstractSet[str]) -> VehicleReadExpanded:
+    """Serialize a vehicle, touching only the relations loaded for `expand`."""
+    data = VehicleRead.from_orm(vehicle).dict()
+    if "driver" in expand:
+        data["driver"] = UserSummary.from_orm(vehicle.driver)
+    return VehicleReadExpanded(**data)
+
 async def create_vehicle(
     db: AsyncSession,
     vehicle_in: Vehicle,
@@ -31,6 +72,63 @@ async def create_vehicle(
         company_id=company_id
     )
     db.add(vehicle)
+    await db.flush()  # the event carries the id
+    # other workers drop their cached fleet schedules on this event
+    add_vehicle_event(db, 'new_vehicle', vehicle)
+    await bump_version(db, company_id, VEHICLES)
     await db.commit()
     await db.refresh(vehicle)
-    return vehicle
\ No newline at end of file
+    from app.services.fleet import fleet_cache
+    if fleet_cache is not None:
+        # this worker's own request must not wait for the event
+        fleet_cache.invalidate(company_id)
+    outbox_dispatcher.wake()
+    return vehicle
+
+def as_utc(value: datetime) -> datetime:
+    # naive query parameters are taken as UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+async def vehicle_availability(
+    db: AsyncSession,
+    vehicle_id: int,
+    company_id: int,
+    start: datetime,
+    end: datetime
+) -> list[TimeSlot]:
+    """
+    Free slots of a vehicle within [start, end). Only the bookings
+    overlapping the window are read, through the GiST index of the
+    bookings overlap constraint.
+    """
+    start, end = as_utc(start), as_utc(end)
+    if end <= start:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "'to' must be after 'from'")
+    if end - start > MAX_AVAILABILITY_WINDOW:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Window is limited to {MAX_AVAILABILITY_WINDOW.days} days"
+        )
+    vehicle = await db.scalar(select(Vehicle.id).where(
+        Vehicle.id == vehicle_id, Vehicle.company_id == company_id
+    ))
+    if vehicle is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Vehicle not found")
+
+    busy = await db.execute(
+        select(func.lower(Booking.period), func.upper(Booking.period))
+        .where(
+            Booking.vehicle_id == vehicle_id,
+            Booking.period.overlaps(func.tstzrange(start, end)),
+        )
+        .order_by(func.lower(Booking.period))
+    )
+    free: list[TimeSlot] = []
+    cursor = start
+    for busy_from, busy_to in busy:
+        if busy_from > cursor:
+            free.append(TimeSlot(start=cursor, end=busy_from))
+        cursor = max(cursor, busy_to)
+    if cursor < end:
+        free.append(TimeSlot(start=cursor, end=end))
+    return free
@@ -0,0 +1,50 @@
+"""
+Per company resource versions behind the ETags of list and report endpoints.
+
+Every write bumps the version of what it changed in its own transaction,
+so a version is visible exactly when the change is. Readers fetch the
+versions before running their query: a write landing in between only
+pairs newer data with the older ETag, which the next poll replaces.
+"""
+from typing import Dict, Iterable
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.resource_version import ResourceVersion
+
+BOOKINGS = "bookings"
+VEHICLES = "vehicles"
+USERS = "users"
+
+async def bump_version(db: AsyncSession, company_id: int, resource: str) -> None:
+    """
+    Does not commit, nor flush the caller's pending changes: their errors
+    still surface from the caller's commit. The upsert locks the counter
+    row until commit, so call it just before committing to keep concurrent
+    writers of the company waiting as little as possible.
+    """
+    stmt = pg_insert(ResourceVersion).values(
+        company_id=company_id, resource=resource, version=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["company_id", "resource"],
+        set_={"version": ResourceVersion.version + 1},
+    )
+    with db.no_autoflush:
+        await db.execute(stmt)
+
+async def get_versions(
+    db: AsyncSession,
+    company_id: int,
+    resources: Iterable[str]
+) -> Dict[str, int]:
+    """Current versions, 0 for resources never written."""
+    resources = list(resources)
+    result = await db.execute(
+        select(ResourceVersion.resource, ResourceVersion.version).where(
+            ResourceVersion.company_id == company_id,
+            ResourceVersion.resource.in_(resources),
+        )
+    )
+    versions = dict(result.all())
+    return {r: versions.get(r, 0) for r in resources}
@@ -0,0 +1,102 @@
+"""
+Parse time and peak memory of the article extraction backends.
+
+Runs every installed backend (plus the original full-tree html.parser
+scraper as a baseline) over the category pages in benchmarks/fixtures.
+--fetch adds the current live page to them. Peak memory comes from
+tracemalloc, so it only counts Python allocations; the C parsers' own
+buffers are not included.
+
+    python -m benchmarks.article_parsing --repeat 50
+    python -m benchmarks.article_parsing --fetch
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+import httpx
+from bs4 import BeautifulSoup
+
+from app.services.articles import HEADERS, STEEA_URL, parse_articles, _installed
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def legacy_parse(html):
+    """The pre-backend scraper: full html.parser tree, repeated find()."""
+    soup = BeautifulSoup(html, "html.parser")
+    articles = []
+    for art in soup.find_all("article"):
+        header = art.find(["h2", "h3"], class_="entry-title") or art.find("a")
+        if not header:
+            continue
+        link = header.find("a") if header.name in ("h2", "h3") else header
+        if not link or not link.get("href"):
+            continue
+        date_tag = art.find("time")
+        excerpt_tag = art.find("div", class_="entry-summary") \
+                   or art.find("div", class_="td-excerpt") \
+                   or art.find("p")
+        articles.append({
+            "title": link.get_text(strip=True),
+            "url": link["href"],
+            "date": date_tag.get_text(strip=True) if date_tag else "",
+            "excerpt": excerpt_tag.get_text(strip=True) if excerpt_tag else "",
+        })
+    return articles
+
+def backends():
+    found = {"legacy": legacy_parse}
+    for name, module in (("html.parser", None), ("lxml", "lxml"), ("selectolax", "selectolax")):
+        if module is None or _installed(module):
+            found[name] = lambda html, name=name: parse_articles(html, name)
+    return found
+
+def measure(fn, html, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(html)
+        durations.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "articles": len(result),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "min_ms": round(min(durations) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+def main(args):
+    if args.fetch:
+        os.makedirs(FIXTURES, exist_ok=True)
+        resp = httpx.get(STEEA_URL, headers=HEADERS, timeout=10.0)
+        resp.raise_for_status()
+        path = os.path.join(FIXTURES, f"steea_{int(time.time())}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(resp.text)
+        print(f"saved {path}")
+
+    paths = args.fixtures or sorted(glob.glob(os.path.join(FIXTURES, "*.html")))
+    if not paths:
+        raise SystemExit("no fixtures: run with --fetch or pass HTML files")
+    report = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        report[os.path.basename(path)] = {
+            name: measure(fn, html, args.repeat) for name, fn in backends().items()
+        }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("fixtures", nargs="*")
+    parser.add_argument("--fetch", action="store_true")
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
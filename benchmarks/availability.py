@@ -0,0 +1,118 @@
+"""
+Vehicle availability and overlap checks on densely scheduled fleets.
+
+Seed with many bookings per vehicle (dense schedules) first. The script
+times `vehicle_availability` for 1, 7 and 31 day windows on random
+vehicles, against a naive variant that reads the whole schedule of the
+vehicle and intersects it in Python. It also times a rejected overlapping
+insert, which the exclusion constraint turns into an index probe. The
+EXPLAIN ANALYZE plan of the availability query is printed first.
+
+    python -m benchmarks.seed --companies 5 --vehicles 100 --bookings 2000000
+    python -m benchmarks.availability --repeat 50
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.services.vehicle import vehicle_availability
+from benchmarks.common import summary, timed
+
+AVAILABILITY_SQL = """
+    SELECT lower(period), upper(period) FROM bookings
+     WHERE vehicle_id = :vehicle_id AND period && tstzrange(:start, :end)
+     ORDER BY lower(period)
+"""
+
+async def naive_availability(db, vehicle_id, start, end):
+    rows = await db.execute(text(
+        "SELECT pickup_time, dropoff_time FROM bookings WHERE vehicle_id = :v"
+    ), {"v": vehicle_id})
+    busy = sorted(
+        (p, d or p) for p, d in rows if p < end and (d or p) >= start
+    )
+    free, cursor = [], start
+    for busy_from, busy_to in busy:
+        if busy_from > cursor:
+            free.append((cursor, busy_from))
+        cursor = max(cursor, busy_to)
+    if cursor < end:
+        free.append((cursor, end))
+    return free
+
+async def main(args):
+    engine = create_async_engine(args.database_url)
+    rng = random.Random(args.seed)
+    report = {}
+    try:
+        async with AsyncSession(engine) as db:
+            vehicles = (await db.execute(text(
+                "SELECT id, company_id, driver_id FROM vehicles "
+                "WHERE registration_number LIKE 'BENCH-%'"
+            ))).all()
+            per_vehicle = (await db.execute(text(
+                "SELECT count(*) / greatest(count(DISTINCT vehicle_id), 1) FROM bookings"
+            ))).scalar()
+            report["bookings_per_vehicle"] = per_vehicle
+            now = datetime.now(timezone.utc)
+
+            vehicle = rng.choice(vehicles)
+            plan = await db.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + AVAILABILITY_SQL), {
+                "vehicle_id": vehicle.id, "start": now - timedelta(days=7), "end": now,
+            })
+            print("\n".join(row[0] for row in plan))
+
+            for days in (1, 7, 31):
+                def window():
+                    end = now - timedelta(days=rng.uniform(0, 1000))
+                    return rng.choice(vehicles), end - timedelta(days=days), end
+
+                async def indexed():
+                    v, start, end = window()
+                    await vehicle_availability(db, v.id, v.company_id, start, end)
+
+                async def naive():
+                    v, start, end = window()
+                    await naive_availability(db, v.id, start, end)
+
+                report[f"availability_{days}d"] = summary(await timed(indexed, args.repeat))
+                report[f"naive_{days}d"] = summary(await timed(naive, args.repeat))
+
+            async def rejected_insert():
+                # a copy of an existing booking always overlaps it
+                booking = (await db.execute(text(
+                    "SELECT * FROM bookings WHERE vehicle_id = :v LIMIT 1"
+                ), {"v": rng.choice(vehicles).id})).mappings().first()
+                try:
+                    await db.execute(text("""
+                        INSERT INTO bookings (driver_id, vehicle_id, company_id, status,
+                                              pickup_time, dropoff_time, origin,
+                                              destination, price)
+                        VALUES (:driver_id, :vehicle_id, :company_id, :status,
+                                :pickup_time, :dropoff_time, :origin,
+                                :destination, :price)
+                    """), dict(booking))
+                    raise RuntimeError("overlapping booking was accepted")
+                except IntegrityError:
+                    await db.rollback()
+
+            report["rejected_overlapping_insert"] = summary(
+                await timed(rejected_insert, args.repeat)
+            )
+    finally:
+        await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=str(settings.DATABASE_URL))
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1234)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,120 @@
+"""
+Plans and latency of the booking report/list queries on a seeded database.
+
+Compares the old extract()/date() predicates against the half-open range
+predicates (and the rollup table), and the users join against the
+denormalized bookings.company_id, for one company. Prints the EXPLAIN
+ANALYZE plan of each variant and its p50/p95/p99 over --repeat runs.
+
+    python -m benchmarks.seed --bookings 1000000
+    python -m benchmarks.booking_queries --repeat 20
+"""
+import argparse
+import asyncio
+import json
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from benchmarks.common import summary, timed
+
+QUERIES = {
+    "year_extract": """
+        SELECT extract(month FROM b.pickup_time) AS period, sum(b.price)
+          FROM bookings b JOIN users u ON u.id = b.driver_id
+         WHERE b.status = 'completed' AND u.company_id = :company_id
+           AND extract(year FROM b.pickup_time) = :year
+         GROUP BY period
+    """,
+    "year_range": """
+        SELECT extract(month FROM b.pickup_time) AS period, sum(b.price)
+          FROM bookings b JOIN users u ON u.id = b.driver_id
+         WHERE b.status = 'completed' AND u.company_id = :company_id
+           AND b.pickup_time >= :year_start AND b.pickup_time < :year_end
+         GROUP BY period
+    """,
+    "year_rollup": """
+        SELECT extract(month FROM day) AS period, sum(price_total)
+          FROM booking_daily_rollups
+         WHERE company_id = :company_id AND status = 'completed'
+           AND day >= :year_start AND day < :year_end
+         GROUP BY period
+    """,
+    "day_date_fn": """
+        SELECT count(*) FROM bookings b JOIN users u ON u.id = b.driver_id
+         WHERE u.company_id = :company_id AND date(b.pickup_time) = :day
+    """,
+    "day_range": """
+        SELECT count(*) FROM bookings b JOIN users u ON u.id = b.driver_id
+         WHERE u.company_id = :company_id
+           AND b.pickup_time >= :day AND b.pickup_time < :day_end
+    """,
+    "day_range_denormalized": """
+        SELECT count(*) FROM bookings b
+         WHERE b.company_id = :company_id
+           AND b.pickup_time >= :day AND b.pickup_time < :day_end
+    """,
+    "list_first_page_join": """
+        SELECT b.* FROM bookings b JOIN users u ON u.id = b.driver_id
+         WHERE u.company_id = :company_id
+         ORDER BY b.pickup_time DESC, b.id DESC LIMIT 100
+    """,
+    "list_first_page_denormalized": """
+        SELECT b.* FROM bookings b
+         WHERE b.company_id = :company_id
+         ORDER BY b.pickup_time DESC, b.id DESC LIMIT 100
+    """,
+    "get_booking_join": """
+        SELECT b.* FROM bookings b JOIN users u ON u.id = b.driver_id
+         WHERE b.id = :booking_id AND u.company_id = :company_id
+    """,
+    "get_booking_denormalized": """
+        SELECT b.* FROM bookings b
+         WHERE b.id = :booking_id AND b.company_id = :company_id
+    """,
+}
+
+async def main(args):
+    year = args.year or date.today().year - 1
+    day = date(year, 6, 15)
+    params = {
+        "company_id": args.company_id,
+        "year": year,
+        "year_start": date(year, 1, 1),
+        "year_end": date(year + 1, 1, 1),
+        "day": day,
+        "day_end": date(year, 6, 16),
+        "booking_id": args.booking_id,
+    }
+    engine = create_async_engine(args.database_url)
+    report = {}
+    try:
+        async with engine.connect() as conn:
+            for name, sql in QUERIES.items():
+                if args.only and name not in args.only:
+                    continue
+                plan = await conn.execute(
+                    text("EXPLAIN (ANALYZE, BUFFERS) " + sql), params
+                )
+                print(f"--- {name}")
+                print("\n".join(row[0] for row in plan))
+
+                async def run(sql=sql):
+                    await conn.execute(text(sql), params)
+
+                report[name] = summary(await timed(run, args.repeat))
+    finally:
+        await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=str(settings.DATABASE_URL))
+    parser.add_argument("--company-id", type=int, default=1)
+    parser.add_argument("--year", type=int, default=None)
+    parser.add_argument("--booking-id", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", nargs="*", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""
+Throughput of POST /bookings/bulk.
+
+Generates synthetic bookings for one of the caller's vehicles and uploads
+them as a JSON array, NDJSON and CSV, printing rows/s for each format.
+The target is at least 10k rows/s against a local database.
+
+    python -m benchmarks.bulk_import --base-url http://localhost:8000 \
+        --username bench-1-1 --password benchpass --vehicle-id 1 --rows 50000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+FIELDS = ("vehicle_id", "status", "pickup_time", "dropoff_time", "origin", "destination", "price")
+
+def make_rows(count, vehicle_id, invalid_fraction):
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        pickup = start + timedelta(minutes=17 * i)
+        yield {
+            "vehicle_id": vehicle_id,
+            "status": random.choice(["upcoming", "in_progress", "completed"]),
+            "pickup_time": pickup.isoformat(),
+            "dropoff_time": (pickup + timedelta(hours=1)).isoformat(),
+            "origin": f"Origin {i % 100}",
+            "destination": f"Destination {i % 100}",
+            # a few rows fail validation so error reporting is exercised
+            "price": "n/a" if random.random() < invalid_fraction else random.randint(10, 200),
+        }
+
+def encode(rows, fmt):
+    if fmt == "json":
+        return json.dumps(rows).encode(), "application/json"
+    if fmt == "ndjson":
+        return "".join(json.dumps(r) + "\n" for r in rows).encode(), "application/x-ndjson"
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode(), "text/csv"
+
+async def main(args):
+    rows = list(make_rows(args.rows, args.vehicle_id, args.invalid_fraction))
+    results = {}
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=600.0) as client:
+        resp = await client.post(
+            "/auth/login", data={"username": args.username, "password": args.password}
+        )
+        resp.raise_for_status()
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        for fmt in args.formats:
+            body, content_type = encode(rows, fmt)
+            start = time.perf_counter()
+            resp = await client.post(
+                "/bookings/bulk", content=body,
+                headers={**headers, "Content-Type": content_type},
+            )
+            elapsed = time.perf_counter() - start
+            resp.raise_for_status()
+            report = resp.json()
+            results[fmt] = {
+                "rows": args.rows,
+                "inserted": report["inserted"],
+                "failed": report["failed"],
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(args.rows / elapsed),
+            }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--vehicle-id", type=int, required=True)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--invalid-fraction", type=float, default=0.001)
+    parser.add_argument("--formats", nargs="+", choices=["json", "ndjson", "csv"],
+                        default=["json", "ndjson", "csv"])
+    asyncio.run(main(parser.parse_args()))
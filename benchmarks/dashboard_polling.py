@@ -0,0 +1,151 @@
+"""
+Dashboard polling with and without conditional requests.
+
+--dashboards clients, each logged in as the admin of a seeded company,
+poll /bookings/, /bookings/earnings, /vehicles/ and /users/ back to back
+for --duration seconds. Meanwhile one writer per company creates a
+booking every --write-interval seconds, so some polls do see changes.
+This runs twice against the app in-process. In the first pass the polls
+carry no validators. In the second each poll sends back the ETag from its
+last response as If-None-Match. The report gives throughput, bytes
+received, latency of 200s and 304s, and SQL statements per response (from
+Server-Timing) for each pass.
+
+    python -m benchmarks.seed --companies 5 --users 20 --bookings 200000
+    python -m benchmarks.dashboard_polling --dashboards 20 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.main import app
+from benchmarks import seed as seeding
+from benchmarks.common import summary
+
+QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+POLLS = [
+    ("/bookings/", {"limit": 50}),
+    ("/bookings/earnings", {"timeframe": "monthly"}),
+    ("/vehicles/", {}),
+    ("/users/", {}),
+]
+
+async def load_admins():
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text("""
+            SELECT u.username, u.company_id,
+                   (SELECT min(v.id) FROM vehicles v
+                     WHERE v.company_id = u.company_id) AS vehicle_id
+              FROM users u JOIN roles r ON r.id = u.role_id
+             WHERE u.username LIKE 'bench-%' AND r.name = 'Admin'
+             ORDER BY u.company_id
+        """))).all()
+    if not rows:
+        raise SystemExit("No seeded admins found; run benchmarks.seed first")
+    return rows
+
+async def login(client, username):
+    resp = await client.post(
+        "/auth/login", data={"username": username, "password": seeding.PASSWORD}
+    )
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+async def dashboard(client, headers, conditional, deadline, stats):
+    etags = {}
+    while time.perf_counter() < deadline:
+        for path, params in POLLS:
+            request_headers = dict(headers)
+            if conditional and path in etags:
+                request_headers["If-None-Match"] = etags[path]
+            start = time.perf_counter()
+            resp = await client.get(path, params=params, headers=request_headers)
+            elapsed = time.perf_counter() - start
+            if resp.status_code not in (200, 304):
+                resp.raise_for_status()
+            if "etag" in resp.headers:
+                etags[path] = resp.headers["etag"]
+            bucket = stats.setdefault(resp.status_code, {"latency": [], "statements": [], "bytes": 0})
+            bucket["latency"].append(elapsed)
+            bucket["bytes"] += len(resp.content)
+            match = QUERIES.search(resp.headers.get("server-timing", ""))
+            if match:
+                bucket["statements"].append(int(match.group(1)))
+
+async def writer(client, headers, vehicle_id, interval, deadline, rng):
+    created = 0
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(interval)
+        pickup = datetime.now(timezone.utc) + timedelta(minutes=rng.randrange(1, 1_000_000))
+        resp = await client.post("/bookings/", headers=headers, json={
+            "vehicle_id": vehicle_id,
+            "status": "upcoming",
+            "pickup_time": pickup.isoformat(),
+            "dropoff_time": (pickup + timedelta(minutes=30)).isoformat(),
+            "origin": "Polling benchmark",
+            "destination": "Polling benchmark",
+            "price": rng.randrange(10, 200),
+        })
+        # 409: the random slot was taken; the next write picks another
+        if resp.status_code == 201:
+            created += 1
+    return created
+
+async def run_pass(client, admins, headers, args, conditional):
+    rng = random.Random(args.seed)
+    stats = {}
+    start = time.perf_counter()
+    deadline = start + args.duration
+    dashboards = [
+        dashboard(client, headers[i % len(admins)], conditional, deadline, stats)
+        for i in range(args.dashboards)
+    ]
+    writers = [
+        writer(client, headers[i], admin.vehicle_id, args.write_interval, deadline, rng)
+        for i, admin in enumerate(admins) if admin.vehicle_id is not None
+    ]
+    results = await asyncio.gather(*dashboards, *writers)
+    elapsed = time.perf_counter() - start
+    requests = sum(len(b["latency"]) for b in stats.values())
+    report = {
+        "requests": requests,
+        "requests_per_second": round(requests / elapsed, 1),
+        "bytes_received": sum(b["bytes"] for b in stats.values()),
+        "bookings_written": sum(results[args.dashboards:]),
+    }
+    for code, bucket in sorted(stats.items()):
+        statements = bucket["statements"]
+        report[str(code)] = {
+            **summary(bucket["latency"]),
+            "mean_statements": round(sum(statements) / len(statements), 2) if statements else None,
+        }
+    return report
+
+async def main(args):
+    admins = await load_admins()
+    report = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            headers = [await login(client, a.username) for a in admins]
+            report["unconditional"] = await run_pass(client, admins, headers, args, False)
+            report["conditional"] = await run_pass(client, admins, headers, args, True)
+    await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dashboards", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--write-interval", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    asyncio.run(main(parser.parse_args()))
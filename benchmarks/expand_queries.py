@@ -0,0 +1,89 @@
+"""
+SQL statements per request for the `?expand=` list endpoints.
+
+Logs in as a seeded admin against the app in-process and reads the query
+count of each request from the Server-Timing header. The check is that the
+count does not grow with the number of rows returned: /bookings/ is read
+with a small and a large page, /vehicles/ and /users/ with and without
+every relation expanded. The script exits non-zero when any count differs,
+i.e. when a relation is loaded per row. tests/test_expand_queries.py makes
+the same check at the service level without a running app.
+
+    python -m benchmarks.seed --companies 2 --users 20 --bookings 20000
+    python -m benchmarks.expand_queries
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+
+import httpx
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.main import app
+
+QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+CHECKS = [
+    # (label, small request, large request)
+    ("bookings", "/bookings/?limit=10&expand=driver,vehicle", "/bookings/?limit=500&expand=driver,vehicle"),
+    ("bookings_unexpanded", "/bookings/?limit=10", "/bookings/?limit=500&expand=driver,vehicle"),
+    ("vehicles", "/vehicles/", "/vehicles/?expand=driver"),
+    ("users", "/users/", "/users/?expand=company,role"),
+]
+
+async def admin_username() -> str:
+    async with engine.connect() as conn:
+        username = (await conn.execute(text("""
+            SELECT u.username FROM users u JOIN roles r ON r.id = u.role_id
+             WHERE u.username LIKE 'bench-%' AND r.name = 'Admin'
+             ORDER BY u.id LIMIT 1
+        """))).scalar()
+    if username is None:
+        raise SystemExit("No seeded admin found; run benchmarks.seed first")
+    return username
+
+async def statements(client, path, headers):
+    resp = await client.get(path, headers=headers)
+    resp.raise_for_status()
+    match = QUERIES.search(resp.headers.get("server-timing", ""))
+    if match is None:
+        raise SystemExit("No Server-Timing header; is METRICS_ENABLED set?")
+    return int(match.group(1)), len(resp.json())
+
+async def main(args):
+    username = await admin_username()
+    report, failed = {}, []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            resp = await client.post(
+                "/auth/login", data={"username": username, "password": args.password}
+            )
+            resp.raise_for_status()
+            headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+            # first request fills the principal cache; don't count it
+            await client.get("/users/", headers=headers)
+
+            for label, small, large in CHECKS:
+                small_count, small_rows = await statements(client, small, headers)
+                large_count, large_rows = await statements(client, large, headers)
+                report[label] = {
+                    small: {"rows": small_rows, "statements": small_count},
+                    large: {"rows": large_rows, "statements": large_count},
+                }
+                if small_count != large_count:
+                    failed.append(label)
+    await engine.dispose()
+
+    report["failed"] = failed
+    print(json.dumps(report, indent=2))
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--password", default="benchpass")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+"Which vehicles are free between T1 and T2" on a large fleet.
+
+Times the anti-join behind GET /vehicles/available and the in-memory
+FleetScheduleCache (loaded once, then queried) on random windows within
+the cache horizon, and prints the EXPLAIN ANALYZE plan of the anti-join.
+Seed one big company first, e.g. 5k vehicles and 1M bookings:
+
+    python -m benchmarks.seed --companies 1 --users 500 --vehicles 5000 \
+        --bookings 1000000
+    python -m benchmarks.fleet_availability --repeat 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.core.principal import Principal
+from app.services.fleet import FleetScheduleCache, available_vehicles
+from benchmarks.common import summary, timed
+
+ANTI_JOIN_SQL = """
+    SELECT v.* FROM vehicles v
+     WHERE v.company_id = :company_id
+       AND NOT EXISTS (
+           SELECT 1 FROM bookings b
+            WHERE b.vehicle_id = v.id AND b.period && tstzrange(:start, :end)
+       )
+"""
+
+async def main(args):
+    engine = create_async_engine(args.database_url)
+    rng = random.Random(args.seed)
+    horizon = timedelta(days=args.horizon_days)
+    report = {}
+    try:
+        async with AsyncSession(engine) as db:
+            company_id = args.company_id or (await db.execute(text(
+                "SELECT company_id FROM vehicles GROUP BY company_id "
+                "ORDER BY count(*) DESC LIMIT 1"
+            ))).scalar()
+            admin = Principal(id=0, username="bench", email="bench@example.com",
+                              role_id=1, company_id=company_id)
+            now = datetime.now(timezone.utc)
+
+            def window():
+                start = now - horizon + timedelta(hours=rng.uniform(0, horizon.days * 24))
+                return start, start + timedelta(hours=args.window_hours)
+
+            start, end = window()
+            plan = await db.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + ANTI_JOIN_SQL), {
+                "company_id": company_id, "start": start, "end": end,
+            })
+            print("\n".join(row[0] for row in plan))
+
+            async def sql():
+                await available_vehicles(db, admin, *window(), use_cache=False)
+
+            report["anti_join"] = summary(await timed(sql, args.repeat))
+
+            cache = FleetScheduleCache(
+                horizon=horizon, ttl_seconds=3600,
+                session_factory=lambda: AsyncSession(engine),
+            )
+            load_start = time.perf_counter()
+            schedule = await cache.get(company_id)
+            report["cache_load_seconds"] = round(time.perf_counter() - load_start, 3)
+            report["vehicles"] = len(schedule.vehicles)
+            report["cached_bookings"] = sum(len(s.starts) for s in schedule.schedules.values())
+
+            async def cached():
+                schedule.available(*window())
+
+            report["cache"] = summary(await timed(cached, args.repeat))
+
+            # both paths must agree
+            start, end = window()
+            from_sql = {v.id for v in await available_vehicles(db, admin, start, end, use_cache=False)}
+            report["paths_agree"] = from_sql == {v.id for v in schedule.available(start, end)}
+    finally:
+        await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=str(settings.DATABASE_URL))
+    parser.add_argument("--company-id", type=int, default=None)
+    parser.add_argument("--horizon-days", type=int, default=30)
+    parser.add_argument("--window-hours", type=float, default=4.0)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1234)
+    asyncio.run(main(parser.parse_args()))
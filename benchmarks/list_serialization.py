@@ -0,0 +1,99 @@
+"""
+Serialization cost of a long list response, old path against fast path.
+
+Two routes serve the same --rows synthetic bookings from memory, so
+the database is left out. The first returns ORM objects through
+response_model=List[BookingRead]: per-row validation with from_attributes,
+then jsonable_encoder, which is how the list endpoints used to answer. The
+second returns the rows as dicts through FastJSONResponse (orjson when
+installed). Both are called in-process. The script prints latency for
+each and checks that the decoded payloads are identical.
+
+    python -m benchmarks.list_serialization --rows 10000 --repeat 30
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+
+# every model must be imported for the relationships to resolve
+import app.models.company  # noqa: F401
+import app.models.role  # noqa: F401
+import app.models.user  # noqa: F401
+import app.models.vehicle  # noqa: F401
+from app.core import responses
+from app.core.responses import FastJSONResponse
+from app.models.booking import Booking, BookingStatus
+from app.schemas.booking import BookingRead
+from benchmarks.common import summary, timed
+
+def make_rows(count, seed):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    statuses = list(BookingStatus)
+    rows = []
+    for i in range(count):
+        pickup = start + timedelta(minutes=30 * i)
+        rows.append({
+            "vehicle_id": rng.randint(1, 100),
+            "status": rng.choice(statuses),
+            "pickup_time": pickup,
+            "dropoff_time": pickup + timedelta(minutes=25) if rng.random() < 0.9 else None,
+            "origin": f"Origin {i % 100}",
+            "destination": f"Destination {i % 100}",
+            "price": rng.randint(10, 200),
+            "id": i + 1,
+            "driver_id": rng.randint(1, 20),
+            "created_at": pickup - timedelta(days=1),
+        })
+    return rows
+
+def build_app(rows):
+    bench = FastAPI()
+
+    @bench.get("/orm", response_model=List[BookingRead])
+    async def orm_path():
+        # ORM objects built per request, as a query would
+        return [Booking(**row) for row in rows]
+
+    @bench.get("/rows", response_model=List[BookingRead])
+    async def rows_path():
+        return FastJSONResponse(rows)
+
+    return bench
+
+async def main(args):
+    rows = make_rows(args.rows, args.seed)
+    transport = httpx.ASGITransport(app=build_app(rows))
+    report = {
+        "rows": args.rows,
+        "encoder": "orjson" if responses.orjson is not None else "json",
+    }
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        bodies = {}
+        for path in ("/orm", "/rows"):
+            resp = await client.get(path)
+            resp.raise_for_status()
+            bodies[path] = resp.content
+
+            async def call():
+                (await client.get(path)).raise_for_status()
+
+            report[path] = summary(await timed(call, args.repeat))
+            report[path]["bytes"] = len(resp.content)
+
+    report["payloads_equal"] = json.loads(bodies["/orm"]) == json.loads(bodies["/rows"])
+    report["speedup_p50"] = round(report["/orm"]["p50_ms"] / max(report["/rows"]["p50_ms"], 0.01), 1)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1234)
+    asyncio.run(main(parser.parse_args()))
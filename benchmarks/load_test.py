@@ -0,0 +1,354 @@
+"""
+Mixed-workload load test of the whole API.
+
+Logs in as seeded users and runs a weighted mix of logins, booking lists,
+reports, booking creation (with websocket subscribers listening for the
+resulting events) and invoice downloads for a fixed duration, first with
+the app in-process (httpx ASGITransport) and/or then over a real uvicorn
+server. Throughput and p50/p95/p99 per endpoint are written to a JSON file
+so runs can be compared across commits. The random stream is seeded, so
+two runs against the same data issue the same sequence of requests.
+
+    python -m benchmarks.seed --companies 5 --users 20 --bookings 200000
+    python -m benchmarks.load_test --mode both --duration 30 \
+        --concurrency 32 --output bench-$(git rev-parse --short HEAD).json
+
+Pass --seed to (re)seed first with the same options as benchmarks.seed, or
+--base-url to target an already running server instead of spawning uvicorn.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks import seed as seeding
+from benchmarks.common import summary
+
+DEFAULT_MIX = "login=1,list_bookings=10,report=4,earnings=2,create_booking=3,invoice=2"
+
+class Account:
+    def __init__(self, row):
+        self.id = row.id
+        self.username = row.username
+        self.company_id = row.company_id
+        self.is_admin = row.role == "Admin"
+        self.vehicle_id = row.vehicle_id
+        self.token = None
+        self.booking_ids: List[int] = []
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+async def load_accounts(database_url: str, limit: int) -> List[Account]:
+    """Seeded users, round-robin over companies, each with a vehicle."""
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.connect() as conn:
+            rows = (await conn.execute(text("""
+                SELECT u.id, u.username, u.company_id, r.name AS role,
+                       (SELECT min(v.id) FROM vehicles v
+                         WHERE v.company_id = u.company_id) AS vehicle_id,
+                       row_number() OVER (PARTITION BY u.company_id ORDER BY u.id) AS n
+                  FROM users u JOIN roles r ON r.id = u.role_id
+                 WHERE u.username LIKE 'bench-%'
+                 ORDER BY n, u.company_id
+                 LIMIT :limit
+            """), {"limit": limit})).all()
+    finally:
+        await engine.dispose()
+    if not rows:
+        raise SystemExit("No seeded users found; run benchmarks.seed first")
+    return [Account(r) for r in rows]
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, weight = part.split("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r}; known: {sorted(OPERATIONS)}")
+        mix[name] = int(weight)
+    return mix
+
+# Operations: async fn(client, account, rng, ctx) -> httpx.Response
+
+async def op_login(client, account, rng, ctx):
+    return await client.post("/auth/login", data={
+        "username": account.username, "password": seeding.PASSWORD,
+    })
+
+async def op_list_bookings(client, account, rng, ctx):
+    resp = await client.get("/bookings/", params={"limit": 50}, headers=account.headers)
+    if resp.status_code == 200 and not account.booking_ids:
+        account.booking_ids = [b["id"] for b in resp.json()]
+    return resp
+
+async def op_report(client, account, rng, ctx):
+    return await client.get("/bookings/report", headers=account.headers, params={
+        "timeframe": rng.choice(["yearly", "monthly", "weekly"]),
+        "year": datetime.now().year - rng.randrange(3),
+    })
+
+async def op_earnings(client, account, rng, ctx):
+    return await client.get(
+        "/bookings/earnings", params={"timeframe": "monthly"}, headers=account.headers
+    )
+
+async def op_create_booking(client, account, rng, ctx):
+    pickup = datetime.now(timezone.utc) + timedelta(minutes=rng.randrange(1, 100_000))
+    start = time.perf_counter()
+    resp = await client.post("/bookings/", headers=account.headers, json={
+        "vehicle_id": account.vehicle_id,
+        "status": "upcoming",
+        "pickup_time": pickup.isoformat(),
+        "dropoff_time": (pickup + timedelta(hours=1)).isoformat(),
+        "origin": "Load test",
+        "destination": "Load test",
+        "price": rng.randrange(10, 200),
+    })
+    if resp.status_code == 201:
+        ctx["created"][resp.json()["id"]] = start
+    return resp
+
+async def op_invoice(client, account, rng, ctx):
+    if not account.booking_ids:
+        return await op_list_bookings(client, account, rng, ctx)
+    booking_id = rng.choice(account.booking_ids)
+    return await client.get(f"/bookings/{booking_id}/invoice", headers=account.headers)
+
+OPERATIONS = {
+    "login": op_login,
+    "list_bookings": op_list_bookings,
+    "report": op_report,
+    "earnings": op_earnings,
+    "create_booking": op_create_booking,
+    "invoice": op_invoice,
+}
+
+async def worker(client, accounts, mix, rng, deadline, ctx):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples, statuses = ctx["samples"], ctx["statuses"]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        account = rng.choice(accounts)
+        start = time.perf_counter()
+        try:
+            resp = await OPERATIONS[name](client, account, rng, ctx)
+            code = str(resp.status_code)
+        except httpx.HTTPError as e:
+            code = type(e).__name__
+        samples.setdefault(name, []).append(time.perf_counter() - start)
+        counts = statuses.setdefault(name, {})
+        counts[code] = counts.get(code, 0) + 1
+
+# Websocket subscribers: one per company admin, recording event arrival
+
+class _InProcessSocket:
+    """Stands in for a websocket attached straight to the app's manager."""
+    def __init__(self, received):
+        self.received = received
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000):
+        pass
+
+    async def send_text(self, payload):
+        record_event(self.received, payload)
+
+def record_event(received, payload):
+    message = json.loads(payload)
+    booking = message.get("booking") or {}
+    if message.get("event") == "new_booking" and "id" in booking:
+        received.setdefault(booking["id"], time.perf_counter())
+
+async def subscribe_in_process(admins, received):
+    from app.core.ws import manager
+    return [
+        await manager.connect(_InProcessSocket(received), a.company_id, None)
+        for a in admins
+    ]
+
+async def subscribe_over_network(base_url, admins, received):
+    import websockets
+
+    ws_url = base_url.replace("http", "ws", 1) + "/bookings/ws/bookings"
+
+    async def listen(account):
+        async with websockets.connect(f"{ws_url}?token={account.token}") as ws:
+            async for message in ws:
+                record_event(received, message)
+
+    return [asyncio.create_task(listen(a)) for a in admins]
+
+async def run_phase(client, accounts, args, subscribe, unsubscribe):
+    mix = parse_mix(args.mix)
+    for account in accounts:
+        resp = await op_login(client, account, None, None)
+        resp.raise_for_status()
+        account.token = resp.json()["access_token"]
+    admins = [a for a in accounts if a.is_admin][:args.ws_subscribers]
+
+    ctx = {"samples": {}, "statuses": {}, "created": {}}
+    received: Dict[int, float] = {}
+    subscriptions = await subscribe(admins, received)
+
+    rng = random.Random(args.rng_seed)
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        worker(client, accounts, mix, random.Random(rng.random()), deadline, ctx)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(args.drain)
+    await unsubscribe(subscriptions)
+
+    endpoints = {}
+    for name, samples in sorted(ctx["samples"].items()):
+        endpoints[name] = {
+            **summary(samples),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "statuses": ctx["statuses"][name],
+        }
+    delivery = [
+        received[i] - sent for i, sent in ctx["created"].items() if i in received
+    ]
+    total = sum(len(s) for s in ctx["samples"].values())
+    return {
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": endpoints,
+        "ws": {
+            "subscribers": len(admins),
+            "bookings_created": len(ctx["created"]),
+            "events_received": len(delivery),
+            "create_to_event": summary(delivery),
+        },
+    }
+
+async def run_in_process(accounts, args):
+    from app.core.ws import manager
+    from app.main import app
+
+    async def unsubscribe(connections):
+        for conn in connections:
+            manager.disconnect(conn)
+
+    # ASGITransport does not run the lifespan, so drive it by hand
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=60.0
+        ) as client:
+            return await run_phase(
+                client, accounts, args, subscribe_in_process, unsubscribe
+            )
+
+async def wait_until_ready(client, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            if (await client.get("/openapi.json")).status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.perf_counter() > deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+async def run_over_uvicorn(accounts, args):
+    base_url, process = args.base_url, None
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        process = subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(args.port), "--workers", str(args.workers),
+            "--log-level", "warning",
+        ])
+
+    async def subscribe(admins, received):
+        return await subscribe_over_network(base_url, admins, received)
+
+    async def unsubscribe(tasks):
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        async with httpx.AsyncClient(
+            base_url=base_url,
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=args.concurrency),
+        ) as client:
+            await wait_until_ready(client)
+            return await run_phase(client, accounts, args, subscribe, unsubscribe)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def main(args):
+    if args.seed:
+        await seeding.main(args)
+    accounts = await load_accounts(args.database_url, args.accounts)
+
+    results = {}
+    if args.mode in ("inprocess", "both"):
+        results["inprocess"] = await run_in_process(accounts, args)
+    if args.mode in ("uvicorn", "both"):
+        results["uvicorn"] = await run_over_uvicorn(accounts, args)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k != "database_url"},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    seeding.add_arguments(parser)
+    parser.add_argument("--seed", action="store_true", help="seed before running")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "both"], default="both")
+    parser.add_argument("--base-url", help="existing server to target instead of spawning uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--drain", type=float, default=2.0,
+                        help="seconds to wait for websocket events after the run")
+    parser.add_argument("--ws-subscribers", type=int, default=10)
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="comma separated operation=weight pairs")
+    parser.add_argument("--rng-seed", type=int, default=1234)
+    parser.add_argument("--output", default="load_test.json")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""
+Latency of unrelated endpoints while the server is flooded with logins.
+
+Runs a quiet baseline first, then the same probe load during a login storm,
+and prints p50/p95/p99 of the probe requests for both phases.
+
+    python -m benchmarks.login_storm --base-url http://localhost:8000 \
+        --username admin --password secret --logins 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.common import summary
+
+async def login(client, username, password):
+    resp = await client.post(
+        "/auth/login", data={"username": username, "password": password}
+    )
+    return resp
+
+async def probe(client, token, duration):
+    """Hit a cheap authenticated endpoint back to back for `duration` seconds."""
+    samples = []
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get("/auth/me", headers=headers)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+async def storm(client, args):
+    statuses = {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        async with semaphore:
+            resp = await login(client, args.username, args.password)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    await asyncio.gather(*(one() for _ in range(args.logins)))
+    return statuses
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0) as client:
+        resp = await login(client, args.username, args.password)
+        resp.raise_for_status()
+        token = resp.json()["access_token"]
+
+        baseline = await probe(client, token, args.duration)
+
+        storm_task = asyncio.create_task(storm(client, args))
+        loaded = await probe(client, token, args.duration)
+        statuses = await storm_task
+
+    print(json.dumps({
+        "baseline": summary(baseline),
+        "during_login_storm": summary(loaded),
+        "login_statuses": statuses,
+    }, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""
+Concurrent company registrations racing for the same names.
+
+Fires --concurrency simultaneous POST /auth/register calls per round. All
+of them use the same company name, and they share usernames and emails in
+pairs, against the app in-process. It then checks that exactly one
+registration per round won, that every loser got a 400 naming the clashing
+field, and that the database holds no duplicates or orphaned companies.
+SQL statements per request are taken from the Server-Timing header.
+
+    python -m benchmarks.registration_race --rounds 20 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import re
+import uuid
+
+import httpx
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.main import app
+
+QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+async def register(client, company, username, email):
+    resp = await client.post("/auth/register", json={
+        "company_name": company,
+        "username": username,
+        "email": email,
+        "password": "benchpass",
+    })
+    match = QUERIES.search(resp.headers.get("server-timing", ""))
+    return resp, int(match.group(1)) if match else None
+
+async def race(client, concurrency):
+    tag = uuid.uuid4().hex[:8]
+    company = f"race-{tag}"
+    calls = [
+        register(client, company, f"race-{tag}-{i // 2}", f"race-{tag}-{i // 2}@example.com")
+        for i in range(concurrency)
+    ]
+    return company, await asyncio.gather(*calls)
+
+async def main(args):
+    statuses, details, statements, winners = {}, {}, [], []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for _ in range(args.rounds):
+                company, results = await race(client, args.concurrency)
+                won = 0
+                for resp, count in results:
+                    statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+                    if resp.status_code == 201:
+                        won += 1
+                        statements.append(count)
+                    else:
+                        detail = resp.json().get("detail", "")
+                        details[detail] = details.get(detail, 0) + 1
+                winners.append((company, won))
+
+    async with engine.connect() as conn:
+        duplicates = (await conn.execute(text("""
+            SELECT count(*) FROM (
+                SELECT name FROM companies WHERE name LIKE 'race-%'
+                 GROUP BY name HAVING count(*) > 1
+            ) d
+        """))).scalar()
+        orphans = (await conn.execute(text("""
+            SELECT count(*) FROM companies c
+             WHERE c.name LIKE 'race-%'
+               AND NOT EXISTS (SELECT 1 FROM users u WHERE u.company_id = c.id)
+        """))).scalar()
+    await engine.dispose()
+
+    print(json.dumps({
+        "rounds": args.rounds,
+        "concurrency": args.concurrency,
+        "statuses": statuses,
+        "rejections": details,
+        "rounds_with_exactly_one_winner": sum(1 for _, won in winners if won == 1),
+        "duplicate_companies": duplicates,
+        "orphaned_companies": orphans,
+        "sql_statements_per_registration": {
+            "min": min(statements, default=0),
+            "max": max(statements, default=0),
+            "mean": round(sum(statements) / len(statements), 2) if statements else 0,
+        },
+    }, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+"""
+In-process load test of the booking websocket fan-out.
+
+Attaches thousands of simulated sockets spread over several companies (a
+fraction of them deliberately slow), fires a series of booking events and
+reports how long `broadcast()` blocks the caller and the delivery latency
+seen by fast and slow sockets.
+
+    python -m benchmarks.ws_broadcast --sockets 5000 --companies 10 \
+        --events 200 --slow-fraction 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from app.core.ws import ConnectionManager
+from benchmarks.common import summary
+
+class FakeWebSocket:
+    def __init__(self, sent_at, latencies, delay):
+        self.sent_at = sent_at
+        self.latencies = latencies
+        self.delay = delay
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000):
+        pass
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)
+        self.latencies.append(time.perf_counter() - self.sent_at[text])
+
+async def main(args):
+    manager = ConnectionManager(slow_consumer_policy=args.policy)
+    await manager.start()
+    sent_at = {}
+    fast, slow = [], []
+    for i in range(args.sockets):
+        is_slow = random.random() < args.slow_fraction
+        ws = FakeWebSocket(sent_at, slow if is_slow else fast,
+                           args.slow_delay if is_slow else 0)
+        await manager.connect(ws, company_id=i % args.companies)
+
+    blocking = []
+    for seq in range(args.events):
+        message = {"event": "new_booking", "booking": {"id": seq, "price": 100}}
+        sent_at[json.dumps(message)] = time.perf_counter()
+        start = time.perf_counter()
+        await manager.broadcast(message, company_id=seq % args.companies)
+        blocking.append(time.perf_counter() - start)
+        await asyncio.sleep(args.interval)
+
+    await asyncio.sleep(args.drain)
+    print(json.dumps({
+        "sockets": args.sockets,
+        "policy": args.policy,
+        "broadcast_call": summary(blocking),
+        "delivery_fast": summary(fast),
+        "delivery_slow": summary(slow),
+        "dropped_messages": manager.dropped_messages,
+        "dropped_connections": manager.dropped_connections,
+    }, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sockets", type=int, default=5000)
+    parser.add_argument("--companies", type=int, default=10)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.005)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--slow-delay", type=float, default=0.5)
+    parser.add_argument("--drain", type=float, default=2.0)
+    parser.add_argument("--policy", choices=["drop_oldest", "disconnect"],
+                        default="drop_oldest")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from app.services import articles as articles_module
+from app.services.articles import parse_articles, validate_parser
+
+FIXTURE = os.path.join(
+    os.path.dirname(__file__), "..", "benchmarks", "fixtures", "steea_category_sample.html"
+)
+
+@pytest.fixture(scope="module")
+def page():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return f.read()
+
+def test_title_comes_from_the_entry_title_header(page):
+    articles = parse_articles(page, "html.parser")
+    assert len(articles) == 19
+    assert all(a["title"] and a["url"].startswith("https://www.steea.gr/2026/") for a in articles)
+
+def test_header_without_link_skips_the_article():
+    html = """
+    <article>
+      <div class="td-module-thumb"><a href="https://example.com/thumb"><img></a></div>
+      <h3 class="entry-title">No link here</h3>
+    </article>
+    <article><a href="https://example.com/plain">Plain</a></article>
+    """
+    articles = parse_articles(html, "html.parser")
+    assert [a["url"] for a in articles] == ["https://example.com/plain"]
+
+def test_missing_backend_fails_validation(monkeypatch):
+    monkeypatch.setattr(articles_module, "_installed", lambda module: False)
+    with pytest.raises(RuntimeError, match="lxml"):
+        validate_parser("lxml")
+    assert validate_parser("auto") == "html.parser"
@@ -0,0 +1,166 @@
+"""
+ArticlesCache against a local stand-in for the upstream site.
+
+The stand-in is a stdlib HTTP server on a random port. Each test scripts
+its responses (200, 304, 500, malformed HTML) and inspects the requests
+it received.
+"""
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services import articles as articles_module
+from app.services.articles import ArticlesCache
+
+PAGE = """
+<html><body>
+<article>
+  <h2 class="entry-title"><a href="https://example.com/one">First</a></h2>
+  <time>1 Jan 2026</time>
+  <div class="entry-summary">Summary one</div>
+</article>
+<article>
+  <h3 class="entry-title"><a href="https://example.com/two">Second</a></h3>
+  <p>Excerpt two</p>
+</article>
+</body></html>
+"""
+
+MALFORMED = """
+<html><body><article><h2 class="entry-title"><a href="https://example.com/x">Unclosed
+<article><div class="entry-summary">no title link</div>
+<p><p><div></span>
+"""
+
+class StandIn:
+    """Serves the scripted responses in order, the last one repeatedly."""
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        self.delay = 0.0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests.append(dict(self.headers))
+                time.sleep(stand_in.delay)
+                index = min(len(stand_in.requests), len(stand_in.responses)) - 1
+                status, headers, body = stand_in.responses[index]
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                data = body.encode()
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def upstream():
+    stand_in = StandIn()
+    yield stand_in
+    stand_in.close()
+
+def run(cache, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await cache.stop()
+    return asyncio.run(main())
+
+def make_cache(upstream, ttl_seconds=300):
+    return ArticlesCache(upstream.url, ttl_seconds=ttl_seconds, refresh_interval=0)
+
+def test_cold_cache_fetches_and_parses(upstream):
+    upstream.responses = [(200, {"ETag": '"v1"'}, PAGE)]
+    cache = make_cache(upstream)
+    articles = run(cache, cache.get())
+    assert [a["title"] for a in articles] == ["First", "Second"]
+    assert articles[0]["date"] == "1 Jan 2026"
+    assert articles[1]["excerpt"] == "Excerpt two"
+    assert cache.etag == '"v1"'
+
+def test_concurrent_cold_requests_share_one_fetch(upstream):
+    upstream.responses = [(200, {}, PAGE)]
+    upstream.delay = 0.2
+    cache = make_cache(upstream)
+
+    async def burst():
+        return await asyncio.gather(*(cache.get() for _ in range(10)))
+
+    results = run(cache, burst())
+    assert len(upstream.requests) == 1
+    assert all(r == results[0] for r in results)
+
+def test_refresh_sends_validators_and_keeps_copy_on_304(upstream):
+    last_modified = "Mon, 05 Jan 2026 10:00:00 GMT"
+    upstream.responses = [
+        (200, {"ETag": '"v1"', "Last-Modified": last_modified}, PAGE),
+        (304, {"ETag": '"v1"'}, ""),
+    ]
+    cache = make_cache(upstream)
+
+    async def scenario():
+        first = await cache.get()
+        await cache.refresh()
+        return first, cache.articles
+
+    first, after = run(cache, scenario())
+    assert after == first
+    assert upstream.requests[1]["If-None-Match"] == '"v1"'
+    assert upstream.requests[1]["If-Modified-Since"] == last_modified
+
+def test_stale_copy_served_while_upstream_fails(upstream):
+    upstream.responses = [(200, {}, PAGE), (500, {}, "boom")]
+    cache = make_cache(upstream, ttl_seconds=0)
+
+    async def scenario():
+        first = await cache.get()
+        # stale: served at once, the refresh runs in the background
+        stale = await cache.get()
+        while cache._inflight is not None:
+            await asyncio.sleep(0.01)
+        return first, stale, await cache.get()
+
+    first, stale, later = run(cache, scenario())
+    assert stale == first
+    assert later == first
+    assert len(upstream.requests) >= 2
+
+def test_cold_cache_upstream_error_is_runtime_error(upstream):
+    upstream.responses = [(500, {}, "boom")]
+    cache = make_cache(upstream)
+    with pytest.raises(RuntimeError, match="Failed to fetch articles"):
+        run(cache, cache.get())
+
+def test_malformed_html_does_not_break_the_cache(upstream):
+    upstream.responses = [(200, {}, MALFORMED)]
+    cache = make_cache(upstream)
+    articles = run(cache, cache.get())
+    assert isinstance(articles, list)
+    assert all(a["url"] for a in articles)
+
+def test_cold_cache_parse_error_is_runtime_error(upstream, monkeypatch):
+    def broken(html, parser=None):
+        raise ValueError("unparseable")
+
+    monkeypatch.setattr(articles_module, "parse_articles", broken)
+    upstream.responses = [(200, {}, PAGE)]
+    cache = make_cache(upstream)
+    with pytest.raises(RuntimeError, match="Failed to parse articles"):
+        run(cache, cache.get())
@@ -0,0 +1,34 @@
+import asyncio
+
+from app.services.booking_import import csv_rows
+
+def parse_csv(data: bytes, chunk_size: int):
+    async def chunks():
+        for i in range(0, len(data), chunk_size):
+            yield data[i:i + chunk_size]
+
+    async def collect():
+        return [row async for row in csv_rows(chunks())]
+
+    return asyncio.run(collect())
+
+CSV = (
+    'vehicle_id,origin,destination\r\n'
+    '1,"Main St\r\nFloor 2","Airport, ""T2"""\r\n'
+    '\r\n'
+    '2,Port,\r\n'
+).encode()
+
+def test_quoted_fields_span_lines_whatever_the_chunking():
+    for chunk_size in (1, 7, len(CSV)):
+        assert parse_csv(CSV, chunk_size) == [
+            (1, {"vehicle_id": "1", "origin": "Main St\r\nFloor 2", "destination": 'Airport, "T2"'}, None),
+            (2, {"vehicle_id": "2", "origin": "Port", "destination": None}, None),
+        ]
+
+def test_bad_rows_are_reported_by_position():
+    data = b'vehicle_id,origin\n1,a,extra\n2,"never closed\n'
+    assert parse_csv(data, 4) == [
+        (1, None, "expected 2 columns, got 3"),
+        (2, None, "invalid CSV: unterminated quoted field"),
+    ]